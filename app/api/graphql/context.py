@@ -0,0 +1,58 @@
+# app/api/graphql/context.py
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from strawberry.fastapi import BaseContext
+from app.core.config import settings
+from app.db import session as db_session
+from app.api.graphql.loaders import Loaders
+
+class Context(BaseContext):
+    """
+    Contexto de un request GraphQL.
+    La sesión de base de datos se abre solo cuando un resolver la usa y se cierra al terminar el request.
+    Con DB_ASYNC_ENABLED los resolvers usan una AsyncSession (`async_db`) en lugar de `db`.
+    """
+    def __init__(self):
+        super().__init__()
+        self.use_async = settings.DB_ASYNC_ENABLED
+        self._db: Optional[Session] = None
+        self._async_db: Optional[AsyncSession] = None
+        # GraphQL resuelve campos hermanos de forma concurrente y una AsyncSession no admite
+        # operaciones simultáneas: el acceso se serializa dentro del request
+        self._async_lock = asyncio.Lock()
+        self.loaders = Loaders(lambda: self.db, self.async_db if self.use_async else None)
+
+    @property
+    def db(self) -> Session:
+        if self._db is None:
+            self._db = db_session.SessionLocal()
+        return self._db
+
+    @asynccontextmanager
+    async def async_db(self) -> AsyncIterator[AsyncSession]:
+        async with self._async_lock:
+            if self._async_db is None:
+                self._async_db = db_session.AsyncSessionLocal()
+            yield self._async_db
+
+    async def close(self):
+        if self._db is not None:
+            await run_in_threadpool(self._db.close)
+            self._db = None
+        if self._async_db is not None:
+            await self._async_db.close()
+            self._async_db = None
+
+async def get_context():
+    """
+    Dependencia de FastAPI que crea el contexto y libera la sesión al final del request
+    """
+    context = Context()
+    try:
+        yield context
+    finally:
+        await context.close()
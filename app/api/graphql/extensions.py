@@ -0,0 +1,222 @@
+# app/api/graphql/extensions.py
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from inspect import isawaitable
+from typing import Any, Callable, Iterator, Optional
+from graphql import GraphQLError, GraphQLResolveInfo
+from strawberry.extensions import SchemaExtension
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import QueryTimer, current_query_timer
+from app.metrics.prometheus import (
+    BoundedLabel, GRAPHQL_OPERATIONS, GRAPHQL_OPERATION_LATENCY, GRAPHQL_PHASE_LATENCY,
+    GRAPHQL_RESOLVER_LATENCY, GRAPHQL_OPERATION_DB_TIME
+)
+
+# El nombre de la operación lo elige el cliente: se acota el número de series
+_operation_label = BoundedLabel(settings.GRAPHQL_METRICS_MAX_OPERATIONS)
+
+
+def _operation_name(execution_context) -> str:
+    return _operation_label(execution_context.operation_name or "anonymous")
+
+
+class PrometheusExtension(SchemaExtension):
+    """
+    Cuenta y mide cada operación GraphQL por nombre y tipo (query, mutation,
+    subscription), ya que a nivel HTTP todas comparten la misma ruta.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        latency = time.perf_counter() - start
+        context = self.execution_context
+        try:
+            operation_type = context.operation_type.value
+        except Exception:
+            # El documento no se pudo parsear o la operación pedida no existe
+            operation_type = "unknown"
+        operation_name = _operation_name(context)
+        status = "error" if context.pre_execution_errors else "success"
+        GRAPHQL_OPERATION_LATENCY.labels(operation_name=operation_name, operation_type=operation_type).observe(latency)
+        GRAPHQL_OPERATIONS.labels(
+            operation_name=operation_name, operation_type=operation_type, status=status
+        ).inc()
+
+
+# Strawberry reutiliza en `resolve` las instancias de extensiones del primer request (el
+# MiddlewareManager queda en caché), así que la operación trazada en curso se busca aquí
+_current_tracing: ContextVar[Optional["TracingExtension"]] = ContextVar("current_tracing", default=None)
+
+
+class TracingExtension(SchemaExtension):
+    """
+    Mide las fases parse, validate y execute de cada operación y, en las operaciones
+    muestreadas (`GRAPHQL_TRACING_SAMPLE_RATE`), el tiempo de cada resolver y el
+    tiempo total en SQL. Así se distingue si una consulta lenta espera a PostgreSQL
+    o se va en convertir y resolver los campos.
+
+    Con `GRAPHQL_TRACE_OPT_IN`, un request con `"extensions": {"trace": true}` se
+    traza siempre y recibe la traza (formato Apollo Tracing más el tiempo en SQL)
+    en el bloque `extensions` de la respuesta.
+    """
+
+    def __init__(self, *, execution_context=None):
+        self.sampled = False
+        self.return_trace = False
+        self._start = 0.0
+        self._started_at: datetime | None = None
+        self._phases: dict[str, tuple[float, float]] = {}
+        self._resolvers: list[dict] = []
+        self._query_timer: QueryTimer | None = None
+
+    def on_operation(self) -> Iterator[None]:
+        requested = (self.execution_context.operation_extensions or {}).get("trace")
+        self.return_trace = settings.GRAPHQL_TRACE_OPT_IN and bool(requested)
+        self.sampled = self.return_trace or random.random() < settings.GRAPHQL_TRACING_SAMPLE_RATE
+        self._start = time.perf_counter()
+        self._started_at = datetime.now(timezone.utc)
+        if not self.sampled:
+            yield
+            return
+        self._query_timer = QueryTimer()
+        timer_token = current_query_timer.set(self._query_timer)
+        tracing_token = _current_tracing.set(self)
+        try:
+            yield
+        finally:
+            _current_tracing.reset(tracing_token)
+            current_query_timer.reset(timer_token)
+            GRAPHQL_OPERATION_DB_TIME.labels(
+                operation_name=_operation_name(self.execution_context)
+            ).observe(self._query_timer.seconds)
+
+    def _phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        yield
+        end = time.perf_counter()
+        self._phases[name] = (start, end)
+        GRAPHQL_PHASE_LATENCY.labels(phase=name).observe(end - start)
+
+    def on_parse(self) -> Iterator[None]:
+        yield from self._phase("parse")
+
+    def on_validate(self) -> Iterator[None]:
+        yield from self._phase("validate")
+
+    def on_execute(self) -> Iterator[None]:
+        yield from self._phase("execute")
+
+    def _record(self, info: GraphQLResolveInfo, start: float):
+        end = time.perf_counter()
+        field = f"{info.parent_type.name}.{info.field_name}"
+        GRAPHQL_RESOLVER_LATENCY.labels(field=field).observe(end - start)
+        if self.return_trace:
+            self._resolvers.append({
+                "path": info.path.as_list(),
+                "parentType": info.parent_type.name,
+                "fieldName": info.field_name,
+                "returnType": str(info.return_type),
+                "startOffset": int((start - self._start) * 1e9),
+                "duration": int((end - start) * 1e9)
+            })
+
+    async def _resolve_async(self, result, info: GraphQLResolveInfo, start: float):
+        try:
+            return await result
+        finally:
+            self._record(info, start)
+
+    def resolve(self, _next: Callable, root: Any, info: GraphQLResolveInfo, *args, **kwargs) -> Any:
+        tracing = _current_tracing.get()
+        # Sin muestreo (o en campos de introspección) se delega sin medir
+        if tracing is None or info.field_name.startswith("__"):
+            return _next(root, info, *args, **kwargs)
+        start = time.perf_counter()
+        result = _next(root, info, *args, **kwargs)
+        if isawaitable(result):
+            return tracing._resolve_async(result, info, start)
+        tracing._record(info, start)
+        return result
+
+    def _phase_trace(self, name: str) -> dict:
+        start, end = self._phases.get(name, (self._start, self._start))
+        return {"startOffset": int((start - self._start) * 1e9), "duration": int((end - start) * 1e9)}
+
+    def get_results(self) -> dict[str, Any]:
+        if not self.return_trace:
+            return {}
+        return {
+            "tracing": {
+                "version": 1,
+                "startTime": self._started_at.isoformat(),
+                "endTime": datetime.now(timezone.utc).isoformat(),
+                "duration": int((time.perf_counter() - self._start) * 1e9),
+                "parsing": self._phase_trace("parse"),
+                "validation": self._phase_trace("validate"),
+                "execution": {**self._phase_trace("execute"), "resolvers": self._resolvers},
+                "database": {
+                    "statements": self._query_timer.count,
+                    "duration": int(self._query_timer.seconds * 1e9)
+                }
+            }
+        }
+
+
+def query_hash(query: str) -> str:
+    """
+    sha256 del texto de la query, el mismo que envían los clientes con APQ
+    """
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()
+
+
+# Código del error con el que el cliente reenvía la query completa: es parte del protocolo
+PERSISTED_QUERY_NOT_FOUND = "PERSISTED_QUERY_NOT_FOUND"
+
+# Queries registradas por los clientes, por hash (Automatic Persisted Queries)
+persisted_queries = TTLCache(
+    maxsize=settings.GRAPHQL_PERSISTED_QUERIES_SIZE,
+    ttl=settings.GRAPHQL_PERSISTED_QUERIES_TTL,
+)
+
+
+class PersistedQueriesExtension(SchemaExtension):
+    """
+    Automatic Persisted Queries (protocolo de Apollo): el cliente envía solo el sha256
+    de la query en `extensions.persistedQuery.sha256Hash`. Si el hash no está
+    registrado responde `PersistedQueryNotFound` y el cliente repite el request con la
+    query completa y el hash, que queda registrado para los siguientes.
+
+    Debe ser la primera extensión del schema: el error se lanza antes de que las demás
+    empiecen la operación.
+    """
+
+    def on_operation(self) -> Iterator[None]:
+        context = self.execution_context
+        persisted = (context.operation_extensions or {}).get("persistedQuery")
+        if persisted and settings.GRAPHQL_PERSISTED_QUERIES_ENABLED:
+            self._resolve_query(context, persisted)
+        yield
+
+    @staticmethod
+    def _resolve_query(context, persisted):
+        if not isinstance(persisted, dict) or persisted.get("version") != 1:
+            raise GraphQLError(
+                "Unsupported persisted query version", extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"}
+            )
+        sha256_hash = persisted.get("sha256Hash")
+        if not isinstance(sha256_hash, str):
+            raise GraphQLError("persistedQuery.sha256Hash is required", extensions={"code": "BAD_USER_INPUT"})
+        if not context.query:
+            query = persisted_queries.get(sha256_hash)
+            if query is None:
+                raise GraphQLError("PersistedQueryNotFound", extensions={"code": PERSISTED_QUERY_NOT_FOUND})
+            context.query = query
+            return
+        if query_hash(context.query) != sha256_hash:
+            raise GraphQLError("provided sha does not match query", extensions={"code": "BAD_USER_INPUT"})
+        persisted_queries.set(sha256_hash, context.query)
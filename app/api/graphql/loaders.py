@@ -0,0 +1,34 @@
+# app/api/graphql/loaders.py
+from typing import AsyncContextManager, Callable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from strawberry.dataloader import DataLoader
+from app.crud import user as crud_user
+from app.api.graphql.schemas.types import User
+from app.api.graphql.resolvers.user_resolver import UserResolver
+
+class Loaders:
+    """
+    DataLoaders de un request GraphQL.
+
+    Todas las cargas de una misma entidad durante la operación se agrupan en una sola
+    consulta `WHERE id IN (...)` y se memorizan hasta que termina el request.
+    """
+    def __init__(
+        self,
+        get_session: Callable[[], Session],
+        async_session: Optional[Callable[[], AsyncContextManager[AsyncSession]]] = None
+    ):
+        # La sesión se obtiene solo cuando un loader realmente consulta la base de datos
+        self.get_session = get_session
+        self.async_session = async_session
+        self.user = DataLoader(load_fn=self._load_users)
+
+    async def _load_users(self, user_ids: List[int]) -> List[Optional[User]]:
+        if self.async_session is not None:
+            async with self.async_session() as db:
+                rows = await crud_user.get_users_by_ids_async(db, user_ids)
+        else:
+            rows = crud_user.get_users_by_ids(self.get_session(), user_ids)
+        users = {user.id: UserResolver.to_graphql(user) for user in rows}
+        return [users.get(user_id) for user_id in user_ids]
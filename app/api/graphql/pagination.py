@@ -0,0 +1,26 @@
+# app/api/graphql/pagination.py
+import base64
+
+# Tamaño máximo de página para las conexiones paginadas
+MAX_PAGE_SIZE = 100
+
+def encode_cursor(*values) -> str:
+    """
+    Codifica la clave de ordenamiento de una fila como cursor opaco
+    """
+    raw = "|".join(str(value) for value in values)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str) -> list[str]:
+    """
+    Decodifica un cursor generado por `encode_cursor`
+    """
+    try:
+        return base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+    except Exception:
+        raise ValueError(f"Cursor inválido: {cursor}")
+
+def page_size(first: int) -> int:
+    if first < 1:
+        raise ValueError("`first` debe ser mayor que 0")
+    return min(first, MAX_PAGE_SIZE)
@@ -0,0 +1,152 @@
+# app/api/graphql/resolvers/inbox_resolver.py
+from datetime import datetime
+from typing import AsyncContextManager, Callable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app.core.cache import unread_count_cache
+from app.crud import notification as crud_notification
+from app.api.graphql.schemas.types import (
+    Notification as NotificationType, NotificationConnection, NotificationEdge, PageInfo
+)
+from app.api.graphql.pagination import encode_cursor, decode_cursor, page_size
+
+# Abre (o reutiliza) la AsyncSession del request con acceso exclusivo
+SessionProvider = Callable[[], AsyncContextManager[AsyncSession]]
+
+class InboxResolver:
+    @staticmethod
+    def to_graphql(n) -> NotificationType:
+        """Convertir una notificación ORM al tipo GraphQL"""
+        return NotificationType(
+            id=n.id,
+            user_id=n.user_id,
+            type=n.type,
+            title=n.title,
+            message=n.message,
+            is_read=n.effective_is_read,
+            created_at=n.created_at.isoformat() if n.created_at else "",
+            read_at=n.effective_read_at.isoformat() if n.effective_read_at else None,
+            metadata=n.extra_data or {}
+        )
+    
+    @staticmethod
+    def get_notifications(db: Session, user_id: int, unread_only: bool = False) -> List[NotificationType]:
+        """Obtener todas las notificaciones (o solo las no leídas) de un usuario"""
+        return [
+            InboxResolver.to_graphql(n)
+            for n in crud_notification.list_notifications(db, user_id, unread_only=unread_only)
+        ]
+    
+    @staticmethod
+    def get_notification(db: Session, notification_id: int) -> Optional[NotificationType]:
+        """Obtener una notificación específica"""
+        n = crud_notification.get_notification(db, notification_id)
+        if not n:
+            return None
+        return InboxResolver.to_graphql(n)
+    
+    @staticmethod
+    def get_unread_count(db: Session, user_id: int) -> int:
+        """Obtener el número de notificaciones no leídas (desde caché si es posible)"""
+        return unread_count_cache.get_or_set(
+            user_id,
+            lambda: crud_notification.count_notifications(db, user_id, unread_only=True)
+        )
+    
+    @staticmethod
+    def _after_key(after: Optional[str]) -> Optional[tuple[datetime, int]]:
+        if not after:
+            return None
+        try:
+            created_at, notification_id = decode_cursor(after)
+            return datetime.fromisoformat(created_at), int(notification_id)
+        except ValueError:
+            raise ValueError(f"Cursor inválido: {after}")
+    
+    @staticmethod
+    def _connection(rows, size: int, count_total) -> NotificationConnection:
+        has_next_page = len(rows) > size
+        edges = [
+            NotificationEdge(
+                cursor=encode_cursor(n.created_at.isoformat(), n.id),
+                node=InboxResolver.to_graphql(n)
+            )
+            for n in rows[:size]
+        ]
+        
+        return NotificationConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=has_next_page,
+                end_cursor=edges[-1].cursor if edges else None
+            ),
+            # El total solo se calcula (con count(*)) si el cliente pide totalCount
+            count_total=count_total
+        )
+    
+    @staticmethod
+    def get_notifications_connection(
+        db: Session,
+        user_id: int,
+        first: int = 20,
+        after: Optional[str] = None,
+        unread_only: bool = False
+    ) -> NotificationConnection:
+        """Obtener una página de la bandeja de un usuario (keyset sobre created_at, id)"""
+        size = page_size(first)
+        after_key = InboxResolver._after_key(after)
+        # Se pide una fila extra para saber si hay página siguiente
+        rows = crud_notification.list_notifications(
+            db, user_id, unread_only=unread_only, limit=size + 1, after=after_key
+        )
+        return InboxResolver._connection(
+            rows, size,
+            lambda: crud_notification.count_notifications(db, user_id, unread_only=unread_only)
+        )
+    
+    # ------------------------------------------------------------------
+    # Versiones asíncronas (DB_ASYNC_ENABLED)
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def get_notifications_async(
+        session: SessionProvider, user_id: int, unread_only: bool = False
+    ) -> List[NotificationType]:
+        async with session() as db:
+            rows = await crud_notification.list_notifications_async(db, user_id, unread_only=unread_only)
+        return [InboxResolver.to_graphql(n) for n in rows]
+    
+    @staticmethod
+    async def get_notification_async(session: SessionProvider, notification_id: int) -> Optional[NotificationType]:
+        async with session() as db:
+            n = await crud_notification.get_notification_async(db, notification_id)
+        return InboxResolver.to_graphql(n) if n else None
+    
+    @staticmethod
+    async def get_unread_count_async(session: SessionProvider, user_id: int) -> int:
+        count = unread_count_cache.get(user_id)
+        if count is None:
+            async with session() as db:
+                count = await crud_notification.count_notifications_async(db, user_id, unread_only=True)
+            unread_count_cache.set(user_id, count)
+        return count
+    
+    @staticmethod
+    async def get_notifications_connection_async(
+        session: SessionProvider,
+        user_id: int,
+        first: int = 20,
+        after: Optional[str] = None,
+        unread_only: bool = False
+    ) -> NotificationConnection:
+        size = page_size(first)
+        after_key = InboxResolver._after_key(after)
+        async with session() as db:
+            rows = await crud_notification.list_notifications_async(
+                db, user_id, unread_only=unread_only, limit=size + 1, after=after_key
+            )
+        
+        async def count_total() -> int:
+            async with session() as db:
+                return await crud_notification.count_notifications_async(db, user_id, unread_only=unread_only)
+        
+        return InboxResolver._connection(rows, size, count_total)
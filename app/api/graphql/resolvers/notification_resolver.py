@@ -1,31 +1,53 @@
 # app/api/graphql/resolvers/notification_resolver.py
+import json
 from typing import List, Optional
 from datetime import datetime
 from sqlalchemy.orm import Session
 from app.db.session import get_db
+from app.db.model import EmailDeliveryOutcome
 from app.crud import user as crud_user
-from app.core.email import enviar_email, enviar_correo_confirmacion, enviar_correo_convocatoria_elegida
+from app.crud import stats as crud_stats
+from app.core.cache import users_count_cache
+from app.core.stats import delivery_stats
+from app.core.delivery_log import delivery_log
+from app.core.email import construir_correo_confirmacion, construir_correo_convocatoria_elegida
+from app.core.dispatch import email_dispatcher
+from app.core.bulk import bulk_engine
 from app.api.graphql.schemas.types import (
     NotificationResult, NotificationStats, RecentNotification, 
-    ValidationResult, User, UserRole, BulkEmailFilters
+    ValidationResult, User, UserRole, BulkEmailFilters, EmailJob,
+    BulkEmailProgress, BulkEmailFailure
 )
-from app.api.graphql.resolvers.user_resolver import UserResolver
+from app.api.graphql.resolvers.user_resolver import SessionProvider, UserResolver
 
 class NotificationResolver:
+    @staticmethod
+    def _filter_args(filters: Optional[BulkEmailFilters]) -> dict:
+        """Traducir BulkEmailFilters a los argumentos de los filtros SQL de usuarios"""
+        if not filters:
+            return {}
+        return {
+            "roles": [role.value for role in filters.roles] if filters.roles else None,
+            "email_domains": filters.email_domains,
+            "exclude_ids": filters.exclude_ids
+        }
+    
     @staticmethod
     def send_welcome_email(db: Session, name: str, email: str) -> NotificationResult:
-        """Enviar correo de bienvenida"""
+        """Encolar correo de bienvenida"""
         try:
-            enviar_correo_confirmacion(email, name)
+            asunto, cuerpo_texto, cuerpo_html = construir_correo_confirmacion(name)
+            job = email_dispatcher.submit("welcome", email, asunto, cuerpo_texto, cuerpo_html)
             return NotificationResult(
                 success=True,
-                message=f"Correo de bienvenida enviado exitosamente a {email}",
-                timestamp=datetime.now().isoformat()
+                message=f"Correo de bienvenida encolado para {email}",
+                timestamp=datetime.now().isoformat(),
+                job_id=job.id
             )
         except Exception as e:
             return NotificationResult(
                 success=False,
-                message=f"Error al enviar correo de bienvenida: {str(e)}",
+                message=f"Error al encolar correo de bienvenida: {str(e)}",
                 timestamp=datetime.now().isoformat()
             )
     
@@ -40,10 +62,9 @@ class NotificationResolver:
         fecha_inicio: str,
         fecha_fin: str
     ) -> NotificationResult:
-        """Enviar notificación de convocatoria elegida"""
+        """Encolar notificación de convocatoria elegida"""
         try:
-            enviar_correo_convocatoria_elegida(
-                destinatario=user_email,
+            asunto, cuerpo_texto, cuerpo_html = construir_correo_convocatoria_elegida(
                 nombre_usuario=user_name,
                 titulo_convocatoria=convocatoria_titulo,
                 descripcion_convocatoria=convocatoria_descripcion,
@@ -51,18 +72,40 @@ class NotificationResolver:
                 fecha_inicio=fecha_inicio,
                 fecha_fin=fecha_fin
             )
+            job = email_dispatcher.submit("convocatoria", user_email, asunto, cuerpo_texto, cuerpo_html)
             return NotificationResult(
                 success=True,
-                message=f"Correo de convocatoria enviado exitosamente a {user_email}",
-                timestamp=datetime.now().isoformat()
+                message=f"Correo de convocatoria encolado para {user_email}",
+                timestamp=datetime.now().isoformat(),
+                job_id=job.id
             )
         except Exception as e:
             return NotificationResult(
                 success=False,
-                message=f"Error al enviar correo de convocatoria: {str(e)}",
+                message=f"Error al encolar correo de convocatoria: {str(e)}",
                 timestamp=datetime.now().isoformat()
             )
     
+    @staticmethod
+    def get_email_job(job_id: int) -> Optional[EmailJob]:
+        """Consultar el estado de un correo en el outbox"""
+        job = email_dispatcher.get_job(job_id)
+        if not job:
+            return None
+        
+        return EmailJob(
+            job_id=job.id,
+            kind=job.kind,
+            recipient=job.recipient,
+            status=job.status,
+            attempts=job.attempts,
+            created_at=job.created_at.isoformat(),
+            updated_at=job.updated_at.isoformat(),
+            error=job.last_error,
+            next_attempt_at=job.next_attempt_at.isoformat() if job.next_attempt_at else None,
+            sent_at=job.sent_at.isoformat() if job.sent_at else None
+        )
+    
     @staticmethod
     def send_bulk_email(
         db: Session, 
@@ -70,44 +113,17 @@ class NotificationResolver:
         content: str, 
         filters: Optional[BulkEmailFilters] = None
     ) -> NotificationResult:
-        """Enviar correo masivo con filtros"""
+        """Lanzar correo masivo con filtros en segundo plano"""
         try:
-            # Obtener todos los usuarios
-            all_users = crud_user.get_all_users(db)
-            target_users = all_users
-            
-            # Aplicar filtros si existen
-            if filters:
-                if filters.roles:
-                    role_values = [role.value for role in filters.roles]
-                    target_users = [user for user in target_users if user.role in role_values]
-                
-                if filters.email_domains:
-                    target_users = [
-                        user for user in target_users 
-                        if any(user.email.endswith(domain) for domain in filters.email_domains)
-                    ]
-                
-                if filters.exclude_ids:
-                    target_users = [user for user in target_users if user.id not in filters.exclude_ids]
-            
-            # Enviar correos
-            failed_emails = []
-            sent_count = 0
-            
-            for user in target_users:
-                try:
-                    enviar_email(user.email, subject, content)
-                    sent_count += 1
-                except Exception as e:
-                    failed_emails.append(user.email)
+            # Los filtros se evalúan en SQL; la audiencia se encola en el outbox con un INSERT ... SELECT
+            filter_args = NotificationResolver._filter_args(filters)
+            job = bulk_engine.start_job(db, subject, content, **filter_args)
             
             return NotificationResult(
-                success=len(failed_emails) == 0,
-                message=f"Correos enviados: {sent_count}, Fallidos: {len(failed_emails)}",
+                success=True,
+                message=f"Envío masivo iniciado para {job.total} destinatarios",
                 timestamp=datetime.now().isoformat(),
-                total_sent=sent_count,
-                failed_emails=failed_emails
+                bulk_job_id=job.id
             )
         except Exception as e:
             return NotificationResult(
@@ -116,46 +132,61 @@ class NotificationResolver:
                 timestamp=datetime.now().isoformat()
             )
     
+    @staticmethod
+    def get_bulk_email_job(job_id: str, failures_offset: int = 0) -> Optional[BulkEmailProgress]:
+        """Consultar el progreso de un envío masivo"""
+        job = bulk_engine.get_job(job_id, failures_offset)
+        if not job:
+            return None
+        
+        return BulkEmailProgress(
+            job_id=job.id,
+            status=job.status,
+            total=job.total,
+            sent=job.sent,
+            failed=job.failed,
+            remaining=job.remaining,
+            created_at=job.created_at.isoformat(),
+            finished_at=job.finished_at.isoformat() if job.finished_at else None,
+            failures=[
+                BulkEmailFailure(email=email, error=error)
+                for email, error in job.failures
+            ]
+        )
+    
     @staticmethod
     def get_notification_stats(db: Session) -> NotificationStats:
-        """Obtener estadísticas de notificaciones"""
-        users = crud_user.get_all_users(db)
-        total_users = len(users)
+        """Estadísticas de envío a partir de los rollups (día, tipo, resultado) y el total de usuarios en caché"""
+        total_users = users_count_cache.get_or_set("total", lambda: crud_user.count_users(db))
+        
+        today = datetime.utcnow().date()
+        daily = crud_stats.get_daily_delivery_counts(db, today)
+        totals = crud_stats.get_total_delivery_counts(db)
+        # Sumar lo que este proceso aún no volcó a la base de datos
+        for (day, type, outcome), count in delivery_stats.pending().items():
+            totals.append((type, outcome, count))
+            if day == today:
+                daily.append((type, outcome, count))
+        
+        sent = EmailDeliveryOutcome.sent.value
+        total_sent = sum(count for _, outcome, count in totals if outcome == sent)
+        total_attempts = sum(count for _, _, count in totals)
+        sent_by_type = {}
+        for type, outcome, count in totals:
+            if outcome == sent:
+                sent_by_type[type] = sent_by_type.get(type, 0) + count
         
-        # Simular estadísticas (en producción estas vendrían de logs/metrics)
         return NotificationStats(
             total_users=total_users,
-            emails_sent_today=0,  # Placeholder - implementar con logs reales
-            success_rate=95.5,    # Placeholder
-            total_emails_sent=0,  # Placeholder
-            emails_by_type='{"welcome": 0, "convocatoria": 0, "bulk": 0}'  # Placeholder
+            emails_sent_today=sum(count for _, outcome, count in daily if outcome == sent),
+            success_rate=round(total_sent * 100 / total_attempts, 1) if total_attempts else 0.0,
+            total_emails_sent=total_sent,
+            emails_by_type=json.dumps(sent_by_type)
         )
     
     @staticmethod
-    def validate_bulk_email(
-        db: Session, 
-        filters: Optional[BulkEmailFilters] = None
-    ) -> ValidationResult:
-        """Validar envío masivo antes de ejecutar"""
-        all_users = crud_user.get_all_users(db)
-        target_users = all_users
-        
-        # Aplicar filtros
-        if filters:
-            if filters.roles:
-                role_values = [role.value for role in filters.roles]
-                target_users = [user for user in target_users if user.role in role_values]
-            
-            if filters.email_domains:
-                target_users = [
-                    user for user in target_users 
-                    if any(user.email.endswith(domain) for domain in filters.email_domains)
-                ]
-            
-            if filters.exclude_ids:
-                target_users = [user for user in target_users if user.id not in filters.exclude_ids]
-        
-        # Convertir a tipos GraphQL para preview
+    def _validation_result(recipient_count: int, preview) -> ValidationResult:
+        # Convertir a tipos GraphQL para preview (solo los primeros 5)
         preview_users = [
             User(
                 id=user.id,
@@ -163,32 +194,59 @@ class NotificationResolver:
                 email=user.email,
                 role=UserRole(user.role)
             )
-            for user in target_users[:5]  # Solo los primeros 5 para preview
+            for user in preview
         ]
         
         # Generar warnings
         warnings = []
-        if len(target_users) > 100:
+        if recipient_count > 100:
             warnings.append("Gran cantidad de destinatarios. Considere envío por lotes.")
-        if len(target_users) == 0:
+        if recipient_count == 0:
             warnings.append("Los filtros no coinciden con ningún usuario.")
         
         return ValidationResult(
-            recipient_count=len(target_users),
-            estimated_delivery_time=f"{len(target_users) * 0.1:.1f} segundos",
+            recipient_count=recipient_count,
+            estimated_delivery_time=f"{recipient_count * 0.1:.1f} segundos",
             warnings=warnings,
             recipient_preview=preview_users
         )
     
+    @staticmethod
+    def validate_bulk_email(
+        db: Session, 
+        filters: Optional[BulkEmailFilters] = None
+    ) -> ValidationResult:
+        """Validar envío masivo antes de ejecutar"""
+        filter_args = NotificationResolver._filter_args(filters)
+        return NotificationResolver._validation_result(
+            crud_user.count_users(db, **filter_args),
+            crud_user.preview_users(db, limit=5, **filter_args)
+        )
+    
+    @staticmethod
+    async def validate_bulk_email_async(
+        session: SessionProvider,
+        filters: Optional[BulkEmailFilters] = None
+    ) -> ValidationResult:
+        """Igual que `validate_bulk_email` sobre la AsyncSession del request (DB_ASYNC_ENABLED)"""
+        filter_args = NotificationResolver._filter_args(filters)
+        async with session() as db:
+            recipient_count = await crud_user.count_users_async(db, **filter_args)
+            preview = await crud_user.preview_users_async(db, limit=5, **filter_args)
+        return NotificationResolver._validation_result(recipient_count, preview)
+    
     @staticmethod
     def get_recent_notifications(db: Session, limit: int = 10) -> List[RecentNotification]:
-        """Obtener notificaciones recientes"""
-        # Placeholder - en producción esto vendría de logs/base de datos
+        """Últimos envíos de correo, servidos desde el buffer en memoria del registro de envíos"""
         return [
             RecentNotification(
-                type="welcome",
-                recipient="ejemplo@test.com",
-                sent_at=datetime.now().isoformat(),
-                status="sent"
+                type=entry["type"],
+                recipient=entry["recipient"],
+                sent_at=entry["created_at"].isoformat(),
+                status=entry["status"],
+                latency_ms=round(entry["latency_ms"], 1),
+                smtp_code=entry["smtp_code"],
+                error=entry["error"]
             )
-        ]
\ No newline at end of file
+            for entry in delivery_log.recent(limit)
+        ]
@@ -1,35 +1,78 @@
 # app/api/graphql/resolvers/user_resolver.py
-from typing import List, Optional
+from typing import AsyncContextManager, Callable, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.db.session import get_db
 from app.crud import user as crud_user
 from app.db.model import User as UserModel, UserRole as UserRoleModel
-from app.api.graphql.schemas.types import User, UserRole
+from app.api.graphql.schemas.types import User, UserRole, UserConnection, UserEdge, PageInfo
+from app.api.graphql.pagination import encode_cursor, decode_cursor, page_size
+
+# Abre (o reutiliza) la AsyncSession del request con acceso exclusivo
+SessionProvider = Callable[[], AsyncContextManager[AsyncSession]]
 
 class UserResolver:
+    @staticmethod
+    def to_graphql(user) -> User:
+        """Convertir un usuario (fila u objeto ORM) al tipo GraphQL"""
+        return User(
+            id=user.id,
+            name=user.name,
+            email=user.email,
+            role=UserRole(user.role)
+        )
+    
     @staticmethod
     def get_all_users(db: Session, role: Optional[UserRole] = None, limit: Optional[int] = None) -> List[User]:
         """Obtener todos los usuarios con filtros opcionales"""
-        users = crud_user.get_all_users(db)
-        
-        # Filtrar por rol si se especifica
-        if role:
-            users = [user for user in users if user.role == role.value]
-        
-        # Limitar resultados si se especifica
-        if limit:
-            users = users[:limit]
+        # Rol y límite se aplican en SQL
+        users = crud_user.list_users(db, role=role.value if role else None, limit=limit or None)
+        return [UserResolver.to_graphql(user) for user in users]
+    
+    @staticmethod
+    def _after_id(after: Optional[str]) -> Optional[int]:
+        if not after:
+            return None
+        try:
+            return int(decode_cursor(after)[0])
+        except (IndexError, ValueError):
+            raise ValueError(f"Cursor inválido: {after}")
+    
+    @staticmethod
+    def _connection(users, size: int) -> UserConnection:
+        has_next_page = len(users) > size
+        edges = [
+            UserEdge(cursor=encode_cursor(user.id), node=UserResolver.to_graphql(user))
+            for user in users[:size]
+        ]
         
-        # Convertir a tipos GraphQL
-        return [
-            User(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                role=UserRole(user.role)
+        return UserConnection(
+            edges=edges,
+            page_info=PageInfo(
+                has_next_page=has_next_page,
+                end_cursor=edges[-1].cursor if edges else None
             )
-            for user in users
-        ]
+        )
+    
+    @staticmethod
+    def get_users_connection(
+        db: Session,
+        first: int = 20,
+        after: Optional[str] = None,
+        role: Optional[UserRole] = None,
+        domain: Optional[str] = None
+    ) -> UserConnection:
+        """Obtener una página de usuarios paginada por cursor (keyset sobre id)"""
+        size = page_size(first)
+        # Se pide una fila extra para saber si hay página siguiente
+        users = crud_user.list_users(
+            db,
+            role=role.value if role else None,
+            email_domain=domain,
+            limit=size + 1,
+            after_id=UserResolver._after_id(after)
+        )
+        return UserResolver._connection(users, size)
     
     @staticmethod
     def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
@@ -38,41 +81,44 @@ class UserResolver:
         if not user:
             return None
         
-        return User(
-            id=user.id,
-            name=user.name,
-            email=user.email,
-            role=UserRole(user.role)
-        )
+        return UserResolver.to_graphql(user)
     
     @staticmethod
     def get_users_by_role(db: Session, role: UserRole) -> List[User]:
         """Obtener usuarios por rol específico"""
-        users = crud_user.get_all_users(db)
-        filtered_users = [user for user in users if user.role == role.value]
-        
-        return [
-            User(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                role=UserRole(user.role)
-            )
-            for user in filtered_users
-        ]
+        users = crud_user.list_users(db, role=role.value)
+        return [UserResolver.to_graphql(user) for user in users]
     
     @staticmethod
     def get_users_by_email_domain(db: Session, domain: str) -> List[User]:
         """Obtener usuarios por dominio de email"""
-        users = crud_user.get_all_users(db)
-        filtered_users = [user for user in users if user.email.endswith(domain)]
-        
-        return [
-            User(
-                id=user.id,
-                name=user.name,
-                email=user.email,
-                role=UserRole(user.role)
+        users = crud_user.list_users(db, email_domain=domain)
+        return [UserResolver.to_graphql(user) for user in users]
+    
+    # ------------------------------------------------------------------
+    # Versiones asíncronas (DB_ASYNC_ENABLED)
+    # ------------------------------------------------------------------
+    @staticmethod
+    async def list_users_async(session: SessionProvider, **filters) -> List[User]:
+        async with session() as db:
+            users = await crud_user.list_users_async(db, **filters)
+        return [UserResolver.to_graphql(user) for user in users]
+    
+    @staticmethod
+    async def get_users_connection_async(
+        session: SessionProvider,
+        first: int = 20,
+        after: Optional[str] = None,
+        role: Optional[UserRole] = None,
+        domain: Optional[str] = None
+    ) -> UserConnection:
+        size = page_size(first)
+        async with session() as db:
+            users = await crud_user.list_users_async(
+                db,
+                role=role.value if role else None,
+                email_domain=domain,
+                limit=size + 1,
+                after_id=UserResolver._after_id(after)
             )
-            for user in filtered_users
-        ]
\ No newline at end of file
+        return UserResolver._connection(users, size)
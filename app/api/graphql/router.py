@@ -1,11 +1,11 @@
 # app/api/graphql/router.py
 from strawberry.fastapi import GraphQLRouter
 from app.api.graphql.schema import schema
-from app.api.graphql.schemas.queries import Context
+from app.api.graphql.context import get_context
 
 # Crear el router GraphQL
 graphql_router = GraphQLRouter(
     schema,
-    context_getter=lambda: Context(),
+    context_getter=get_context,  # Sesión de BD por request, cerrada al terminar
     graphiql=True  # Habilita GraphQL Playground en desarrollo
 )
\ No newline at end of file
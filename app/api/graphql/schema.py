@@ -1,10 +1,40 @@
 # app/api/graphql/schema.py
 import strawberry
+from strawberry.extensions import ParserCache, ValidationCache
+from app.core.config import settings
 from app.api.graphql.schemas.queries import Query
 from app.api.graphql.schemas.mutations import Mutation
+from app.api.graphql.schemas.subscriptions import Subscription
+from app.api.graphql.extensions import (
+    PERSISTED_QUERY_NOT_FOUND, PersistedQueriesExtension, PrometheusExtension, TracingExtension
+)
+
+
+class Schema(strawberry.Schema):
+    """
+    Schema que no registra como error los `PersistedQueryNotFound` de APQ: son la
+    respuesta esperada al primer request de cada query y llenarían el log de errores.
+    """
+
+    def process_errors(self, errors, execution_context=None) -> None:
+        errors = [
+            error for error in errors
+            if (error.extensions or {}).get("code") != PERSISTED_QUERY_NOT_FOUND
+        ]
+        super().process_errors(errors, execution_context)
+
 
 # Crear el schema GraphQL principal
-schema = strawberry.Schema(
+schema = Schema(
     query=Query,
-    mutation=Mutation
+    mutation=Mutation,
+    subscription=Subscription,
+    extensions=[
+        PersistedQueriesExtension,  # APQ: queries enviadas por hash
+        PrometheusExtension,  # Métricas por operación, fase y resolver
+        TracingExtension,
+        # Reutilizan el documento parseado y el resultado de la validación de queries repetidas
+        ParserCache(maxsize=settings.GRAPHQL_DOCUMENT_CACHE_SIZE),
+        ValidationCache(maxsize=settings.GRAPHQL_DOCUMENT_CACHE_SIZE)
+    ]
 )
\ No newline at end of file
@@ -1,25 +1,24 @@
 # app/api/graphql/schemas/mutations.py
 import strawberry
-from typing import Optional
-from strawberry.fastapi import BaseContext
+from strawberry.scalars import JSON
+from typing import List, Optional
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.api.graphql.context import Context
 from app.api.graphql.schemas.types import (
     NotificationResult, WelcomeEmailInput, ConvocatoriaInput, 
-    BulkEmailInput, UserInput, UserWithNotification, User, UserRole,
+    BulkEmailInput, BulkEmailFilters, UserInput, UserWithNotification, User, UserRole,
     Notification as NotificationType, NotificationInput
 )
 from app.api.graphql.resolvers.notification_resolver import NotificationResolver
 from app.api.graphql.resolvers.user_resolver import UserResolver
+from app.api.graphql.resolvers.inbox_resolver import InboxResolver
 from app.crud import user as crud_user
+from app.crud import notification as crud_notification
 from app.core.email import enviar_correo_confirmacion
+from app.core.cache import unread_count_cache, users_count_cache
 from app.db.model import Notification
 from datetime import datetime
 
-class Context(BaseContext):
-    def __init__(self):
-        self.db = next(get_db())
-
 @strawberry.type
 class Mutation:
     @strawberry.mutation
@@ -103,6 +102,7 @@ class Mutation:
                 info.context.db.add(db_notification)
                 info.context.db.commit()
                 info.context.db.refresh(db_notification)
+                unread_count_cache.invalidate(user_id)
                 print(f"✅ Notificación de bienvenida creada para usuario ID {user_id}: {input.email}")
             except Exception as e:
                 print(f"⚠️ Error creando notificación en DB: {e}")
@@ -116,9 +116,10 @@ class Mutation:
                 role=input.role
             )
             
-            # Obtener total de usuarios
-            all_users = crud_user.get_all_users(info.context.db)
-            total_users = len(all_users) + 1  # +1 por el usuario "creado"
+            # Total de usuarios (count(*) en caché, como en notificationStats)
+            db = info.context.db
+            total_users = users_count_cache.get_or_set("total", lambda: crud_user.count_users(db))
+            total_users += 1  # +1 por el usuario "creado"
             
             return UserWithNotification(
                 user=user,
@@ -148,99 +149,144 @@ class Mutation:
     
     # Notification mutations
     @strawberry.mutation
-    def create_notification(
+    async def create_notification(
         self,
         info: strawberry.Info[Context],
         notification: NotificationInput
     ) -> NotificationType:
         """Crear una nueva notificación"""
-        db_notification = Notification(
-            user_id=notification.user_id,
-            type=notification.type,
-            title=notification.title,
-            message=notification.message,
-            extra_data=notification.metadata or {},
-            is_read=False,
-            created_at=datetime.utcnow()
-        )
-        info.context.db.add(db_notification)
-        info.context.db.commit()
-        info.context.db.refresh(db_notification)
-        
-        return NotificationType(
-            id=db_notification.id,
-            user_id=db_notification.user_id,
-            type=db_notification.type,
-            title=db_notification.title,
-            message=db_notification.message,
-            is_read=db_notification.is_read,
-            created_at=db_notification.created_at.isoformat(),
-            read_at=None,
-            metadata=db_notification.extra_data or {}
+        args = (
+            notification.user_id,
+            notification.type,
+            notification.title,
+            notification.message,
+            notification.metadata
         )
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                db_notification = await crud_notification.create_notification_async(db, *args)
+        else:
+            db_notification = crud_notification.create_notification(info.context.db, *args)
+        unread_count_cache.invalidate(db_notification.user_id)
+        return InboxResolver.to_graphql(db_notification)
+    
+    @strawberry.mutation
+    async def create_notifications(
+        self,
+        info: strawberry.Info[Context],
+        notifications: List[NotificationInput]
+    ) -> List[NotificationType]:
+        """Crear varias notificaciones en una sola sentencia (INSERT multi-fila con RETURNING)"""
+        items = [
+            {
+                "user_id": notification.user_id,
+                "type": notification.type,
+                "title": notification.title,
+                "message": notification.message,
+                "extra_data": notification.metadata
+            }
+            for notification in notifications
+        ]
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                created = await crud_notification.create_notifications_async(db, items)
+        else:
+            created = crud_notification.create_notifications(info.context.db, items)
+        for user_id in {n.user_id for n in created}:
+            unread_count_cache.invalidate(user_id)
+        return [InboxResolver.to_graphql(n) for n in created]
+    
+    @strawberry.mutation
+    async def broadcast_notification(
+        self,
+        info: strawberry.Info[Context],
+        type: str,
+        title: str,
+        message: str,
+        filters: Optional[BulkEmailFilters] = None,
+        metadata: Optional[JSON] = None
+    ) -> int:
+        """Crear una notificación para cada usuario que cumple los filtros (un solo INSERT ... SELECT)"""
+        filter_args = NotificationResolver._filter_args(filters)
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                inserted = await crud_notification.broadcast_notification_async(
+                    db, type, title, message, metadata, **filter_args
+                )
+        else:
+            inserted = crud_notification.broadcast_notification(
+                info.context.db, type, title, message, metadata, **filter_args
+            )
+        # La audiencia puede abarcar a cualquier usuario: se descartan todos los contadores
+        if inserted:
+            unread_count_cache.clear()
+        return inserted
     
     @strawberry.mutation
-    def mark_as_read(
+    async def mark_as_read(
         self,
         info: strawberry.Info[Context],
         notification_id: int
     ) -> NotificationType:
         """Marcar notificación como leída"""
-        db_notification = info.context.db.query(Notification).filter(
-            Notification.id == notification_id
-        ).first()
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                db_notification = await crud_notification.mark_notification_read_async(db, notification_id)
+        else:
+            db_notification = crud_notification.mark_notification_read(info.context.db, notification_id)
         
         if not db_notification:
             raise Exception(f"Notification {notification_id} not found")
         
-        db_notification.is_read = True
-        db_notification.read_at = datetime.utcnow()
-        info.context.db.commit()
-        info.context.db.refresh(db_notification)
-        
-        return NotificationType(
-            id=db_notification.id,
-            user_id=db_notification.user_id,
-            type=db_notification.type,
-            title=db_notification.title,
-            message=db_notification.message,
-            is_read=db_notification.is_read,
-            created_at=db_notification.created_at.isoformat(),
-            read_at=db_notification.read_at.isoformat() if db_notification.read_at else None,
-            metadata=db_notification.extra_data or {}
-        )
+        unread_count_cache.invalidate(db_notification.user_id)
+        return InboxResolver.to_graphql(db_notification)
     
     @strawberry.mutation
-    def mark_all_as_read(
+    async def mark_many_as_read(
+        self,
+        info: strawberry.Info[Context],
+        ids: List[int]
+    ) -> List[NotificationType]:
+        """Marcar varias notificaciones como leídas en una sola sentencia (los IDs inexistentes se omiten)"""
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                updated = await crud_notification.mark_notifications_read_async(db, ids)
+        else:
+            updated = crud_notification.mark_notifications_read(info.context.db, ids)
+        for user_id in {n.user_id for n in updated}:
+            unread_count_cache.invalidate(user_id)
+        return [InboxResolver.to_graphql(n) for n in updated]
+    
+    @strawberry.mutation
+    async def mark_all_as_read(
         self,
         info: strawberry.Info[Context],
         user_id: int
     ) -> bool:
         """Marcar todas las notificaciones como leídas para un usuario"""
-        info.context.db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).update({
-            "is_read": True,
-            "read_at": datetime.utcnow()
-        })
-        info.context.db.commit()
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                await crud_notification.mark_all_read_async(db, user_id)
+        else:
+            crud_notification.mark_all_read(info.context.db, user_id)
+        unread_count_cache.invalidate(user_id)
         return True
     
     @strawberry.mutation
-    def delete_notification(
+    async def delete_notification(
         self,
         info: strawberry.Info[Context],
         notification_id: int
     ) -> bool:
         """Eliminar una notificación"""
-        db_notification = info.context.db.query(Notification).filter(
-            Notification.id == notification_id
-        ).first()
+        if info.context.use_async:
+            async with info.context.async_db() as db:
+                db_notification = await crud_notification.delete_notification_async(db, notification_id)
+        else:
+            db_notification = crud_notification.delete_notification(info.context.db, notification_id)
         
         if not db_notification:
             return False
         
-        info.context.db.delete(db_notification)
-        info.context.db.commit()
-        return True
\ No newline at end of file
+        unread_count_cache.invalidate(db_notification.user_id)
+        return True
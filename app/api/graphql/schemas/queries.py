@@ -1,108 +1,119 @@
 # app/api/graphql/schemas/queries.py
 import strawberry
 from typing import List, Optional
-from strawberry.fastapi import BaseContext
 from sqlalchemy.orm import Session
-from app.db.session import get_db
+from app.api.graphql.context import Context
 from app.api.graphql.schemas.types import (
-    User, UserRole, NotificationStats, RecentNotification, 
-    ValidationResult, BulkEmailFilters, Notification as NotificationType
+    User, UserRole, UserConnection, NotificationStats, RecentNotification, 
+    ValidationResult, BulkEmailFilters, EmailJob, BulkEmailProgress,
+    Notification as NotificationType, NotificationConnection
 )
 from app.api.graphql.resolvers.user_resolver import UserResolver
 from app.api.graphql.resolvers.notification_resolver import NotificationResolver
-from app.db.model import Notification
-
-class Context(BaseContext):
-    def __init__(self):
-        self.db = next(get_db())
+from app.api.graphql.resolvers.inbox_resolver import InboxResolver
 
 @strawberry.type
 class Query:
     # User queries
     @strawberry.field
-    def users(
+    async def users(
         self, 
         info: strawberry.Info[Context],
         role: Optional[UserRole] = None,
         limit: Optional[int] = None
     ) -> List[User]:
         """Obtener todos los usuarios con filtros opcionales"""
+        if info.context.use_async:
+            return await UserResolver.list_users_async(
+                info.context.async_db, role=role.value if role else None, limit=limit or None
+            )
         return UserResolver.get_all_users(info.context.db, role, limit)
     
+    @strawberry.field
+    async def users_connection(
+        self,
+        info: strawberry.Info[Context],
+        first: int = 20,
+        after: Optional[str] = None,
+        role: Optional[UserRole] = None,
+        domain: Optional[str] = None
+    ) -> UserConnection:
+        """Obtener usuarios paginados por cursor (estilo Relay)"""
+        if info.context.use_async:
+            return await UserResolver.get_users_connection_async(info.context.async_db, first, after, role, domain)
+        return UserResolver.get_users_connection(info.context.db, first, after, role, domain)
+    
     @strawberry.field  
-    def user(self, info: strawberry.Info[Context], id: int) -> Optional[User]:
+    async def user(self, info: strawberry.Info[Context], id: int) -> Optional[User]:
         """Obtener usuario por ID"""
-        return UserResolver.get_user_by_id(info.context.db, id)
+        return await info.context.loaders.user.load(id)
     
     @strawberry.field
-    def users_by_role(self, info: strawberry.Info[Context], role: UserRole) -> List[User]:
+    async def users_by_ids(self, info: strawberry.Info[Context], ids: List[int]) -> List[Optional[User]]:
+        """Obtener varios usuarios por ID en una sola consulta (null si no existe)"""
+        return await info.context.loaders.user.load_many(ids)
+    
+    @strawberry.field
+    async def users_by_role(self, info: strawberry.Info[Context], role: UserRole) -> List[User]:
         """Obtener usuarios por rol específico"""
+        if info.context.use_async:
+            return await UserResolver.list_users_async(info.context.async_db, role=role.value)
         return UserResolver.get_users_by_role(info.context.db, role)
     
     @strawberry.field
-    def users_by_email_domain(self, info: strawberry.Info[Context], domain: str) -> List[User]:
+    async def users_by_email_domain(self, info: strawberry.Info[Context], domain: str) -> List[User]:
         """Obtener usuarios por dominio de email"""
+        if info.context.use_async:
+            return await UserResolver.list_users_async(info.context.async_db, email_domain=domain)
         return UserResolver.get_users_by_email_domain(info.context.db, domain)
     
     # Notification queries
     @strawberry.field
-    def notifications(self, info: strawberry.Info[Context], user_id: int) -> List[NotificationType]:
+    async def notifications(self, info: strawberry.Info[Context], user_id: int) -> List[NotificationType]:
         """Obtener todas las notificaciones de un usuario"""
-        db_notifications = info.context.db.query(Notification).filter(
-            Notification.user_id == user_id
-        ).order_by(Notification.created_at.desc()).all()
-        
-        return [NotificationType(
-            id=n.id,
-            user_id=n.user_id,
-            type=n.type,
-            title=n.title,
-            message=n.message,
-            is_read=n.is_read,
-            created_at=n.created_at.isoformat() if n.created_at else "",
-            read_at=n.read_at.isoformat() if n.read_at else None,
-            metadata=n.extra_data or {}
-        ) for n in db_notifications]
+        if info.context.use_async:
+            return await InboxResolver.get_notifications_async(info.context.async_db, user_id)
+        return InboxResolver.get_notifications(info.context.db, user_id)
     
     @strawberry.field
-    def unread_notifications(self, info: strawberry.Info[Context], user_id: int) -> List[NotificationType]:
+    async def unread_notifications(self, info: strawberry.Info[Context], user_id: int) -> List[NotificationType]:
         """Obtener notificaciones no leídas de un usuario"""
-        db_notifications = info.context.db.query(Notification).filter(
-            Notification.user_id == user_id,
-            Notification.is_read == False
-        ).order_by(Notification.created_at.desc()).all()
-        
-        return [NotificationType(
-            id=n.id,
-            user_id=n.user_id,
-            type=n.type,
-            title=n.title,
-            message=n.message,
-            is_read=n.is_read,
-            created_at=n.created_at.isoformat() if n.created_at else "",
-            read_at=n.read_at.isoformat() if n.read_at else None,
-            metadata=n.extra_data or {}
-        ) for n in db_notifications]
+        if info.context.use_async:
+            return await InboxResolver.get_notifications_async(info.context.async_db, user_id, unread_only=True)
+        return InboxResolver.get_notifications(info.context.db, user_id, unread_only=True)
     
     @strawberry.field
-    def notification(self, info: strawberry.Info[Context], notification_id: int) -> Optional[NotificationType]:
-        """Obtener una notificación específica"""
-        n = info.context.db.query(Notification).filter(Notification.id == notification_id).first()
-        if not n:
-            return None
-        
-        return NotificationType(
-            id=n.id,
-            user_id=n.user_id,
-            type=n.type,
-            title=n.title,
-            message=n.message,
-            is_read=n.is_read,
-            created_at=n.created_at.isoformat() if n.created_at else "",
-            read_at=n.read_at.isoformat() if n.read_at else None,
-            metadata=n.extra_data or {}
+    async def unread_count(self, info: strawberry.Info[Context], user_id: int) -> int:
+        """Obtener el número de notificaciones no leídas de un usuario (para el badge)"""
+        if info.context.use_async:
+            return await InboxResolver.get_unread_count_async(info.context.async_db, user_id)
+        return InboxResolver.get_unread_count(info.context.db, user_id)
+    
+    @strawberry.field
+    async def notifications_connection(
+        self,
+        info: strawberry.Info[Context],
+        user_id: int,
+        first: int = 20,
+        after: Optional[str] = None,
+        unread_only: bool = False
+    ) -> NotificationConnection:
+        """Obtener la bandeja de un usuario paginada por cursor, de la más reciente a la más antigua"""
+        if info.context.use_async:
+            return await InboxResolver.get_notifications_connection_async(
+                info.context.async_db, user_id, first, after, unread_only
+            )
+        return InboxResolver.get_notifications_connection(
+            info.context.db, user_id, first, after, unread_only
         )
     
+    @strawberry.field
+    async def notification(self, info: strawberry.Info[Context], notification_id: int) -> Optional[NotificationType]:
+        """Obtener una notificación específica"""
+        if info.context.use_async:
+            return await InboxResolver.get_notification_async(info.context.async_db, notification_id)
+        return InboxResolver.get_notification(info.context.db, notification_id)
+    
     # Stats queries
     @strawberry.field
     def notification_stats(self, info: strawberry.Info[Context]) -> NotificationStats:
@@ -119,10 +130,27 @@ class Query:
         return NotificationResolver.get_recent_notifications(info.context.db, limit)
     
     @strawberry.field
-    def validate_bulk_email(
+    def email_job(self, info: strawberry.Info[Context], job_id: int) -> Optional[EmailJob]:
+        """Consultar el estado de un correo en el outbox"""
+        return NotificationResolver.get_email_job(job_id)
+    
+    @strawberry.field
+    def bulk_email_job(
+        self,
+        info: strawberry.Info[Context],
+        job_id: str,
+        failures_offset: int = 0
+    ) -> Optional[BulkEmailProgress]:
+        """Consultar el progreso de un envío masivo (fallos desde `failuresOffset`)"""
+        return NotificationResolver.get_bulk_email_job(job_id, failures_offset)
+    
+    @strawberry.field
+    async def validate_bulk_email(
         self, 
         info: strawberry.Info[Context],
         filters: Optional[BulkEmailFilters] = None
     ) -> ValidationResult:
         """Validar envío masivo antes de ejecutar"""
+        if info.context.use_async:
+            return await NotificationResolver.validate_bulk_email_async(info.context.async_db, filters)
         return NotificationResolver.validate_bulk_email(info.context.db, filters)
\ No newline at end of file
@@ -0,0 +1,29 @@
+# app/api/graphql/schemas/subscriptions.py
+import asyncio
+import strawberry
+from typing import AsyncGenerator
+from starlette.concurrency import run_in_threadpool
+from app.core.bulk import BulkJobStatus
+from app.api.graphql.schemas.types import BulkEmailProgress
+from app.api.graphql.resolvers.notification_resolver import NotificationResolver
+
+@strawberry.type
+class Subscription:
+    @strawberry.subscription
+    async def bulk_email_progress(
+        self,
+        job_id: str,
+        interval: float = 1.0
+    ) -> AsyncGenerator[BulkEmailProgress, None]:
+        """Emitir el progreso de un envío masivo hasta que termine; cada evento trae solo los fallos nuevos"""
+        failures_offset = 0
+        while True:
+            # Las consultas son síncronas: se ejecutan fuera del event loop
+            progress = await run_in_threadpool(NotificationResolver.get_bulk_email_job, job_id, failures_offset)
+            if progress is None:
+                return
+            failures_offset += len(progress.failures)
+            yield progress
+            if progress.status != BulkJobStatus.RUNNING:
+                return
+            await asyncio.sleep(max(interval, 0.2))
@@ -1,8 +1,9 @@
 # app/api/graphql/schemas/types.py
+import inspect
 import strawberry
 from strawberry.scalars import JSON
 from enum import Enum
-from typing import List, Optional
+from typing import Awaitable, Callable, List, Optional, Union
 from datetime import datetime
 
 @strawberry.enum
@@ -18,6 +19,21 @@ class User:
     email: str
     role: UserRole
 
+@strawberry.type
+class PageInfo:
+    has_next_page: bool
+    end_cursor: Optional[str] = None
+
+@strawberry.type
+class UserEdge:
+    cursor: str
+    node: User
+
+@strawberry.type
+class UserConnection:
+    edges: List[UserEdge]
+    page_info: PageInfo
+
 @strawberry.type
 class Notification:
     id: int
@@ -29,7 +45,30 @@ class Notification:
     created_at: str
     read_at: Optional[str] = None
     metadata: Optional[JSON] = None
-    user: Optional[User] = None
+
+    @strawberry.field
+    async def user(self, info: strawberry.Info) -> Optional[User]:
+        """Usuario destinatario (agrupado con DataLoader para evitar N+1)"""
+        return await info.context.loaders.user.load(self.user_id)
+
+@strawberry.type
+class NotificationEdge:
+    cursor: str
+    node: Notification
+
+@strawberry.type
+class NotificationConnection:
+    edges: List[NotificationEdge]
+    page_info: PageInfo
+    count_total: strawberry.Private[Callable[[], Union[int, Awaitable[int]]]]
+
+    @strawberry.field
+    async def total_count(self) -> int:
+        """Total de notificaciones que cumplen el filtro (sin materializar filas)"""
+        total = self.count_total()
+        if inspect.isawaitable(total):
+            total = await total
+        return total
 
 @strawberry.input
 class NotificationInput:
@@ -46,6 +85,38 @@ class NotificationResult:
     timestamp: str
     total_sent: Optional[int] = None
     failed_emails: Optional[List[str]] = None
+    job_id: Optional[int] = None  # ID del correo en el outbox (consultable con emailJob)
+    bulk_job_id: Optional[str] = None  # ID del envío masivo (consultable con bulkEmailJob)
+
+@strawberry.type
+class EmailJob:
+    job_id: int
+    kind: str
+    recipient: str
+    status: str  # pending, sending, sent, dead
+    attempts: int
+    created_at: str
+    updated_at: str
+    error: Optional[str] = None
+    next_attempt_at: Optional[str] = None
+    sent_at: Optional[str] = None
+
+@strawberry.type
+class BulkEmailFailure:
+    email: str
+    error: str
+
+@strawberry.type
+class BulkEmailProgress:
+    job_id: str
+    status: str  # running, completed
+    total: int
+    sent: int
+    failed: int
+    remaining: int
+    created_at: str
+    finished_at: Optional[str] = None
+    failures: List[BulkEmailFailure]  # Fallos a partir de `failuresOffset`
 
 @strawberry.type
 class NotificationStats:
@@ -61,6 +132,9 @@ class RecentNotification:
     recipient: str
     sent_at: str
     status: str
+    latency_ms: Optional[float] = None
+    smtp_code: Optional[int] = None
+    error: Optional[str] = None
 
 @strawberry.type
 class ValidationResult:
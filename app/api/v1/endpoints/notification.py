@@ -2,54 +2,106 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 from app.db.session import get_db
-from app.crud.user import obtener_emails, get_all_users
-from app.core.email import enviar_email, enviar_correo_confirmacion, enviar_correo_convocatoria_elegida
-from app.api.v1.schemas import UserOut, UserCreatedNotification, ConvocatoriaElegidaNotification, NotificationResponse
+from app.crud.user import get_all_users
+from app.core.email import construir_correo_confirmacion, construir_correo_convocatoria_elegida
+from app.core.dispatch import email_dispatcher
+from app.core.bulk import bulk_engine
+from app.api.v1.schemas import (
+    UserOut, UserCreatedNotification, ConvocatoriaElegidaNotification,
+    NotificationJobResponse, EmailJobStatus, BulkEmailJobResponse, BulkEmailProgressOut, BulkEmailFailureOut
+)
 from app.crud import user as crud_user
 
 router = APIRouter()
 
-@router.post("/enviar-correo/")
+@router.post(
+    "/enviar-correo/",
+    response_model=BulkEmailJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 def enviar_correos(db: Session = Depends(get_db)):
-    emails = obtener_emails(db)
-    for email in emails:
-        enviar_email(email, "Asunto", "Este es el contenido del correo")
-    return {"message": f"Correos enviados a {len(emails)} usuarios"}
+    """
+    Lanza el envío masivo a todos los usuarios en segundo plano
+    """
+    job = bulk_engine.start_job(db, "Asunto", "Este es el contenido del correo")
+    return BulkEmailJobResponse(
+        success=True,
+        message=f"Envío masivo iniciado para {job.total} usuarios",
+        job_id=job.id,
+        total=job.total
+    )
+
+@router.get("/enviar-correo/{job_id}", response_model=BulkEmailProgressOut)
+def obtener_progreso_envio_masivo(job_id: str, failures_offset: int = 0):
+    """
+    Consultar el progreso de un envío masivo; `failures_offset` permite leer solo los fallos nuevos
+    """
+    job = bulk_engine.get_job(job_id, failures_offset)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Envío masivo {job_id} no encontrado"
+        )
+
+    return BulkEmailProgressOut(
+        job_id=job.id,
+        status=job.status,
+        total=job.total,
+        sent=job.sent,
+        failed=job.failed,
+        remaining=job.remaining,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+        failures=[
+            BulkEmailFailureOut(email=email, error=error)
+            for email, error in job.failures
+        ]
+    )
 
 @router.get("/users/")
 def get_all_users(db: Session = Depends(get_db)):
     return crud_user.get_all_users(db)
 
-@router.post("/usuario-creado/", response_model=NotificationResponse)
+@router.post(
+    "/usuario-creado/",
+    response_model=NotificationJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 def notificar_usuario_creado(user_data: UserCreatedNotification):
     """
     Endpoint para recibir notificaciones de usuarios creados desde el microservicio de autenticación
-    y enviar correo de confirmación
+    y encolar el correo de confirmación en el outbox
     """
     try:
-        # Enviar correo de confirmación
-        enviar_correo_confirmacion(user_data.email, user_data.name)
-        
-        return NotificationResponse(
-            success=True,
-            message=f"Correo de confirmación enviado exitosamente a {user_data.email}"
-        )
+        # Registrar correo de confirmación; el envío ocurre en segundo plano
+        asunto, cuerpo_texto, cuerpo_html = construir_correo_confirmacion(user_data.name)
+        job = email_dispatcher.submit("welcome", user_data.email, asunto, cuerpo_texto, cuerpo_html)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al enviar correo de confirmación: {str(e)}"
+            detail=f"Error al encolar correo de confirmación: {str(e)}"
         )
 
-@router.post("/convocatoria-elegida/", response_model=NotificationResponse)
+    return NotificationJobResponse(
+        success=True,
+        message=f"Correo de confirmación encolado para {user_data.email}",
+        job_id=job.id,
+        status=job.status
+    )
+
+@router.post(
+    "/convocatoria-elegida/",
+    response_model=NotificationJobResponse,
+    status_code=status.HTTP_202_ACCEPTED
+)
 def notificar_convocatoria_elegida(convocatoria_data: ConvocatoriaElegidaNotification):
     """
     Endpoint para recibir notificaciones cuando un usuario elige una convocatoria
-    desde el microservicio de convocatorias y enviar correo de confirmación
+    desde el microservicio de convocatorias y encolar el correo de confirmación en el outbox
     """
     try:
-        # Enviar correo de confirmación de convocatoria elegida
-        enviar_correo_convocatoria_elegida(
-            destinatario=convocatoria_data.user_email,
+        # Registrar correo de confirmación de convocatoria elegida
+        asunto, cuerpo_texto, cuerpo_html = construir_correo_convocatoria_elegida(
             nombre_usuario=convocatoria_data.user_name,
             titulo_convocatoria=convocatoria_data.convocatoria_titulo,
             descripcion_convocatoria=convocatoria_data.convocatoria_descripcion,
@@ -57,13 +109,43 @@ def notificar_convocatoria_elegida(convocatoria_data: ConvocatoriaElegidaNotific
             fecha_inicio=convocatoria_data.fecha_inicio,
             fecha_fin=convocatoria_data.fecha_fin
         )
-        
-        return NotificationResponse(
-            success=True,
-            message=f"Correo de confirmación de convocatoria enviado exitosamente a {convocatoria_data.user_email}"
+        job = email_dispatcher.submit(
+            "convocatoria", convocatoria_data.user_email, asunto, cuerpo_texto, cuerpo_html
         )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Error al enviar correo de confirmación de convocatoria: {str(e)}"
+            detail=f"Error al encolar correo de confirmación de convocatoria: {str(e)}"
+        )
+
+    return NotificationJobResponse(
+        success=True,
+        message=f"Correo de confirmación de convocatoria encolado para {convocatoria_data.user_email}",
+        job_id=job.id,
+        status=job.status
+    )
+
+@router.get("/jobs/{job_id}", response_model=EmailJobStatus)
+def obtener_estado_envio(job_id: int):
+    """
+    Consultar el estado de un correo registrado en el outbox
+    """
+    job = email_dispatcher.get_job(job_id)
+    if not job:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Trabajo de correo {job_id} no encontrado"
         )
+
+    return EmailJobStatus(
+        job_id=job.id,
+        kind=job.kind,
+        recipient=job.recipient,
+        status=job.status,
+        attempts=job.attempts,
+        error=job.last_error,
+        created_at=job.created_at,
+        updated_at=job.updated_at,
+        next_attempt_at=job.next_attempt_at,
+        sent_at=job.sent_at
+    )
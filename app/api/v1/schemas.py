@@ -1,4 +1,6 @@
 # app/api/v1/schemas.py
+from datetime import datetime
+from typing import Optional
 from pydantic import BaseModel, EmailStr
 
 from app.db.model import UserRole
@@ -31,4 +33,42 @@ class ConvocatoriaElegidaNotification(BaseModel):
 # Schema para respuesta de notificación
 class NotificationResponse(BaseModel):
     success: bool
-    message: str
\ No newline at end of file
+    message: str
+
+# Schema para respuesta de notificación encolada (202 Accepted)
+class NotificationJobResponse(NotificationResponse):
+    job_id: int
+    status: str
+
+# Schema para consultar el estado de un correo en el outbox
+class EmailJobStatus(BaseModel):
+    job_id: int
+    kind: str
+    recipient: str
+    status: str  # pending, sending, sent, dead
+    attempts: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: datetime
+    next_attempt_at: Optional[datetime] = None
+    sent_at: Optional[datetime] = None
+
+# Schemas para envíos masivos en segundo plano
+class BulkEmailJobResponse(NotificationResponse):
+    job_id: str
+    total: int
+
+class BulkEmailFailureOut(BaseModel):
+    email: str
+    error: str
+
+class BulkEmailProgressOut(BaseModel):
+    job_id: str
+    status: str  # running, completed
+    total: int
+    sent: int
+    failed: int
+    remaining: int
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+    failures: list[BulkEmailFailureOut]
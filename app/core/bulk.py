@@ -0,0 +1,94 @@
+# app/core/bulk.py
+import logging
+import uuid
+from datetime import datetime
+from app.core.dispatch import email_dispatcher
+from app.crud import bulk as crud_bulk
+from app.db.model import EmailOutboxStatus
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class BulkJobStatus:
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+
+class BulkEmailJob:
+    """
+    Progreso de un envío masivo: enviados, fallidos y pendientes
+    """
+    def __init__(
+        self,
+        id: str,
+        subject: str,
+        total: int,
+        created_at: datetime,
+        counts: dict[str, int] | None = None,
+        finished_at: datetime | None = None,
+        failures: list[tuple[str, str]] | None = None
+    ):
+        counts = counts or {}
+        self.id = id
+        self.subject = subject
+        self.total = total
+        self.sent = counts.get(EmailOutboxStatus.sent.value, 0)
+        self.failed = counts.get(EmailOutboxStatus.dead.value, 0)
+        self.failures = failures or []  # (email, error) a partir del offset pedido
+        self.created_at = created_at
+        self.finished_at = finished_at
+        self.status = BulkJobStatus.RUNNING if self.remaining else BulkJobStatus.COMPLETED
+
+    @property
+    def remaining(self) -> int:
+        return max(self.total - self.sent - self.failed, 0)
+
+    @property
+    def finished(self) -> bool:
+        return self.status != BulkJobStatus.RUNNING
+
+
+class BulkEmailEngine:
+    """
+    Envíos masivos sobre el outbox de correos.
+
+    Lanzar un envío encola un mensaje por destinatario en `email_outbox` (ver
+    `crud.bulk.create_job`) y los workers del despachador los envían con los mismos
+    reintentos, leases y dead-letter que el resto de correos. Así el progreso sobrevive a
+    una caída del proceso y cualquier réplica puede consultarlo, y el presupuesto
+    `BULK_EMAIL_RATE_PER_SECOND` es global (ver `crud.outbox.claim_bulk_batch`).
+    """
+
+    def start_job(self, db, subject: str, content: str, **filters) -> BulkEmailJob:
+        """
+        Encola `content` para cada usuario que cumple los filtros y retorna el trabajo para consultar su progreso
+        """
+        job = crud_bulk.create_job(db, uuid.uuid4().hex, subject, content, **filters)
+        email_dispatcher.wake()
+        logger.info(f"Envío masivo {job.id} encolado para {job.total} destinatarios")
+        return BulkEmailJob(job.id, job.subject, job.total, job.created_at)
+
+    def get_job(self, job_id: str, failures_offset: int = 0) -> BulkEmailJob | None:
+        """
+        Lee el progreso del envío y los fallos a partir del `failures_offset`-ésimo
+        """
+        db = SessionLocal()
+        try:
+            job = crud_bulk.get_job(db, job_id)
+            if job is None:
+                return None
+            counts = crud_bulk.count_job_messages(db, job_id)
+            failures = [
+                (email, error or "")
+                for email, error in crud_bulk.get_job_failures(db, job_id, failures_offset)
+            ]
+            progress = BulkEmailJob(job.id, job.subject, job.total, job.created_at, counts, failures=failures)
+            if progress.finished:
+                progress.finished_at = crud_bulk.get_job_finished_at(db, job_id) or job.created_at
+            return progress
+        finally:
+            db.close()
+
+
+bulk_engine = BulkEmailEngine()
@@ -0,0 +1,69 @@
+# app/core/cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+from app.core.config import settings
+
+
+class TTLCache:
+    """
+    Caché en memoria del proceso con expiración por tiempo y desalojo LRU.
+
+    La invalidación es local al proceso: con varias réplicas, las demás sirven el
+    valor anterior como máximo durante `ttl` segundos.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 10.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_set(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Retorna el valor en caché o lo calcula con `loader` y lo guarda
+        """
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = loader()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Contador de notificaciones no leídas por usuario (badge del frontend)
+unread_count_cache = TTLCache(
+    maxsize=settings.UNREAD_COUNT_CACHE_SIZE,
+    ttl=settings.UNREAD_COUNT_CACHE_TTL,
+)
+
+# Total de usuarios para notificationStats
+users_count_cache = TTLCache(maxsize=1, ttl=settings.USERS_COUNT_CACHE_TTL)
@@ -0,0 +1,99 @@
+# app/core/compaction.py
+import logging
+import threading
+import time
+from app.core.config import settings
+from app.crud import notification as crud_notification
+from app.db.session import SessionLocal
+from app.metrics.prometheus import READ_WATERMARKS_PENDING
+
+logger = logging.getLogger(__name__)
+
+
+class ReadWatermarkCompactor:
+    """
+    Hilo en segundo plano que aplica las marcas "todas leídas" (`notification_read_state`)
+    a las filas de `notifications`.
+
+    Marcar todo como leído solo mueve la marca del usuario; las filas se actualizan aquí
+    en lotes pequeños y espaciados, de modo que un usuario con miles de notificaciones
+    pendientes no genera una escritura grande (ni WAL) en el momento del clic. Solo se
+    compactan marcas con al menos `min_age` segundos para no competir con inserciones
+    en curso. Aplicar la marca es idempotente, así que varias réplicas pueden ejecutar
+    el compactador a la vez.
+
+    Cada pasada lee las marcas de a `page_size` y sigue hasta vaciarlas o agotar
+    `time_budget` segundos; lo que quede se ve en `notification_read_watermarks_pending`.
+    """
+
+    def __init__(
+        self,
+        interval: float = 300.0,
+        batch_size: int = 1000,
+        min_age: float = 60.0,
+        time_budget: float = 60.0,
+        page_size: int = 100
+    ):
+        self.interval = interval
+        self.batch_size = batch_size
+        self.min_age = min_age
+        self.time_budget = time_budget
+        self.page_size = page_size
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="read-watermark-compactor", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        thread, self._thread = self._thread, None
+        self._stopping.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def run_once(self) -> int:
+        """
+        Compacta las marcas pendientes y retorna el número de filas actualizadas
+        """
+        deadline = time.monotonic() + self.time_budget
+        db = SessionLocal()
+        try:
+            total = 0
+            while True:
+                # Las marcas aplicadas se eliminan y las que cambian entretanto dejan de
+                # tener `min_age`, así que cada página trae marcas nuevas
+                pending = crud_notification.pending_read_watermarks(db, self.min_age, self.page_size)
+                for user_id, watermark in pending:
+                    if self._out_of_time(deadline):
+                        break
+                    total += crud_notification.compact_read_watermark(db, user_id, watermark, self.batch_size)
+                if len(pending) < self.page_size or self._out_of_time(deadline):
+                    break
+            READ_WATERMARKS_PENDING.set(crud_notification.count_pending_read_watermarks(db, self.min_age))
+            return total
+        finally:
+            db.close()
+
+    def _out_of_time(self, deadline: float) -> bool:
+        return self._stopping.is_set() or time.monotonic() >= deadline
+
+    def _run(self):
+        while not self._stopping.wait(self.interval):
+            try:
+                compacted = self.run_once()
+                if compacted:
+                    logger.info(f"Marcas de lectura compactadas: {compacted} notificaciones actualizadas")
+            except Exception as e:
+                logger.error(f"Error compactando marcas de lectura: {str(e)}")
+
+
+read_watermark_compactor = ReadWatermarkCompactor(
+    interval=settings.READ_WATERMARK_COMPACTION_INTERVAL,
+    batch_size=settings.READ_WATERMARK_COMPACTION_BATCH_SIZE,
+    min_age=settings.READ_WATERMARK_COMPACTION_MIN_AGE,
+    time_budget=settings.READ_WATERMARK_COMPACTION_TIME_BUDGET,
+)
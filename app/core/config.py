@@ -1,4 +1,5 @@
 # app/core/config.py
+from typing import Literal, Optional
 from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
@@ -10,6 +11,80 @@ class Settings(BaseSettings):
     
     # Configuración adicional
     LOG_LEVEL: str = "INFO"
+
+    # Servidor SMTP y pool de conexiones
+    SMTP_HOST: str = "smtp.gmail.com"
+    SMTP_PORT: int = 465
+    SMTP_USE_SSL: bool = True  # False para usar STARTTLS (p. ej. puerto 587)
+    SMTP_TIMEOUT: float = 30.0
+    SMTP_POOL_SIZE: int = 3
+    SMTP_POOL_MAX_MESSAGES_PER_CONNECTION: int = 100
+    SMTP_POOL_IDLE_TIMEOUT: float = 120.0  # segundos antes de descartar una conexión inactiva
+    SMTP_POOL_HEALTHCHECK_INTERVAL: float = 30.0  # inactividad a partir de la cual se verifica con NOOP
+    SMTP_POOL_CHECKOUT_TIMEOUT: float = 30.0
+    SMTP_POOL_WARMUP: bool = True
+
+    # Despacho de correos en segundo plano (outbox persistente)
+    EMAIL_DISPATCH_WORKERS: int = 3
+    EMAIL_OUTBOX_BATCH_SIZE: int = 10  # mensajes reclamados por cada consulta
+    EMAIL_OUTBOX_LEASE_SECONDS: float = 120.0  # tras este tiempo otro worker puede reclamar el mensaje
+    EMAIL_OUTBOX_NODE_ID: Optional[str] = None  # por defecto "<hostname>:<pid>"
+    EMAIL_OUTBOX_POLL_INTERVAL: float = 2.0  # segundos entre consultas cuando no hay trabajo
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5
+    EMAIL_OUTBOX_BACKOFF_BASE: float = 30.0  # segundos antes del primer reintento
+    EMAIL_OUTBOX_BACKOFF_MAX: float = 3600.0
+    EMAIL_OUTBOX_METRICS_INTERVAL: float = 15.0  # segundos entre actualizaciones del gauge de backlog
+
+    # Envíos masivos
+    BULK_EMAIL_RATE_PER_SECOND: float = 5.0  # presupuesto global de mensajes por segundo (0 = sin límite)
+
+    # Estadísticas de envíos (rollups email_delivery_stats / email_delivery_totals)
+    EMAIL_STATS_FLUSH_INTERVAL: float = 10.0  # segundos entre volcados de los contadores en memoria
+    USERS_COUNT_CACHE_TTL: float = 60.0  # segundos que se reutiliza el total de usuarios
+
+    # Registro de envíos (email_delivery_log) y buffer de recentNotifications
+    DELIVERY_LOG_FLUSH_INTERVAL: float = 2.0  # segundos entre escrituras por lotes
+    DELIVERY_LOG_BATCH_SIZE: int = 500  # entradas por INSERT
+    DELIVERY_LOG_MAX_PENDING: int = 10000  # entradas retenidas en memoria si la base de datos no responde
+    RECENT_DELIVERIES_SIZE: int = 200  # últimos envíos que se conservan en memoria
+
+    # Caché del contador de notificaciones no leídas
+    UNREAD_COUNT_CACHE_TTL: float = 10.0  # segundos
+    UNREAD_COUNT_CACHE_SIZE: int = 10000  # usuarios en caché
+
+    # Compactación de las marcas "todas leídas" (notification_read_state)
+    READ_WATERMARK_COMPACTION_INTERVAL: float = 300.0  # segundos entre pasadas
+    READ_WATERMARK_COMPACTION_BATCH_SIZE: int = 1000  # filas actualizadas por transacción
+    READ_WATERMARK_COMPACTION_MIN_AGE: float = 60.0  # segundos que debe tener la marca antes de compactarla
+    READ_WATERMARK_COMPACTION_TIME_BUDGET: float = 60.0  # segundos máximos por pasada
+
+    # Particionado mensual de notifications y retención
+    NOTIFICATIONS_PARTITIONED: bool = True  # instalaciones nuevas crean la tabla particionada
+    NOTIFICATIONS_PARTITION_MONTHS_AHEAD: int = 3  # particiones futuras creadas por adelantado
+    NOTIFICATIONS_PARTITION_MAINTENANCE_INTERVAL: float = 3600.0  # segundos entre pasadas de mantenimiento
+    NOTIFICATIONS_RETENTION_DAYS: Optional[int] = None  # elimina meses completos ya leídos (None desactiva)
+    NOTIFICATIONS_UNREAD_RETENTION_DAYS: Optional[int] = None  # elimina meses completos aunque tengan no leídas
+    NOTIFICATIONS_RETENTION_ACTION: Literal["drop", "detach"] = "drop"  # detach conserva la partición para archivarla
+
+    # Métricas de Prometheus
+    GRAPHQL_METRICS_MAX_OPERATIONS: int = 200  # nombres de operación distintos antes de agruparlos como "other"
+    GRAPHQL_TRACING_SAMPLE_RATE: float = 0.01  # fracción de operaciones con tiempos por resolver y de SQL
+    GRAPHQL_TRACE_OPT_IN: bool = True  # permite pedir la traza en la respuesta con extensions: {"trace": true}
+
+    # Caché de documentos GraphQL y persisted queries (APQ)
+    GRAPHQL_DOCUMENT_CACHE_SIZE: int = 1000  # documentos parseados y validados que se reutilizan (0 desactiva)
+    GRAPHQL_PERSISTED_QUERIES_ENABLED: bool = True  # acepta extensions.persistedQuery con el sha256 de la query
+    GRAPHQL_PERSISTED_QUERIES_SIZE: int = 5000  # queries registradas por proceso
+    GRAPHQL_PERSISTED_QUERIES_TTL: float = 86400.0  # segundos que se conserva una query registrada
+
+    # Pool de conexiones a la base de datos
+    DB_POOL_SIZE: int = 5  # conexiones que se mantienen abiertas
+    DB_MAX_OVERFLOW: int = 10  # conexiones extra permitidas en picos
+    DB_POOL_TIMEOUT: float = 30.0  # segundos de espera por una conexión libre
+    DB_POOL_RECYCLE: int = 1800  # segundos antes de reemplazar una conexión (-1 desactiva)
+    DB_POOL_PRE_PING: bool = True  # verifica la conexión antes de entregarla
+    DB_STATEMENT_TIMEOUT_MS: int = 0  # statement_timeout de PostgreSQL (0 desactiva)
+    DB_ASYNC_ENABLED: bool = False  # resolvers GraphQL sobre AsyncSession (asyncpg) en vez de la sesión síncrona
     
     class Config:
         env_file = ".env"
@@ -0,0 +1,152 @@
+# app/core/delivery_log.py
+import logging
+import smtplib
+import threading
+from collections import deque
+from datetime import datetime
+from app.core.config import settings
+from app.crud import delivery_log as crud_delivery_log
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def smtp_response_code(error: Exception | None) -> int | None:
+    """
+    Código de respuesta SMTP de un envío: 250 si se aceptó, el del rechazo si lo hubo
+    """
+    if error is None:
+        return 250
+    if isinstance(error, smtplib.SMTPRecipientsRefused) and error.recipients:
+        return next(iter(error.recipients.values()))[0]
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code
+    return None
+
+
+class DeliveryLog:
+    """
+    Registro de cada intento de envío de correo (`email_delivery_log`).
+
+    Las entradas se acumulan en memoria y un hilo las inserta por lotes (un INSERT
+    multi-fila cada `flush_interval` segundos o al juntar `batch_size`), así que
+    registrar un envío no agrega un round trip a la base de datos. Las últimas
+    `recent_size` entradas del proceso se conservan en un buffer circular para servir
+    `recentNotifications` sin consultar la tabla. Si la base de datos no responde, se
+    conservan como máximo `max_pending` entradas y se descartan las más antiguas.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = 2.0,
+        batch_size: int = 500,
+        max_pending: int = 10000,
+        recent_size: int = 200,
+    ):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+        self._recent: deque[dict] = deque(maxlen=recent_size)
+        self._pending: deque[dict] = deque()
+        self._dropped = 0
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(
+        self,
+        type: str,
+        recipient: str,
+        status: str,
+        latency_ms: float,
+        error: Exception | None = None
+    ):
+        entry = {
+            "type": type,
+            "recipient": recipient,
+            "status": status,
+            "smtp_code": smtp_response_code(error),
+            "latency_ms": latency_ms,
+            "error": str(error)[:1000] if error is not None else None,
+            "created_at": datetime.utcnow()
+        }
+        with self._lock:
+            self._recent.append(entry)
+            self._pending.append(entry)
+            while len(self._pending) > self.max_pending:
+                self._pending.popleft()
+                self._dropped += 1
+            full = len(self._pending) >= self.batch_size
+        if full:
+            self._wakeup.set()
+
+    def recent(self, limit: int = 10) -> list[dict]:
+        """
+        Últimas entradas registradas por este proceso, de la más reciente a la más antigua
+        """
+        with self._lock:
+            entries = list(self._recent)
+        return entries[::-1][:max(limit, 0)]
+
+    def flush(self) -> int:
+        """
+        Inserta las entradas pendientes por lotes y retorna cuántas se escribieron
+        """
+        written = 0
+        with self._flush_lock:
+            while True:
+                with self._lock:
+                    batch = [self._pending.popleft() for _ in range(min(self.batch_size, len(self._pending)))]
+                    dropped, self._dropped = self._dropped, 0
+                if dropped:
+                    logger.warning(f"Se descartaron {dropped} entradas del registro de envíos sin escribir")
+                if not batch:
+                    return written
+                db = SessionLocal()
+                try:
+                    crud_delivery_log.add_entries(db, batch)
+                except Exception:
+                    # Vuelven al frente de la cola para reintentar en el próximo volcado
+                    with self._lock:
+                        self._pending.extendleft(reversed(batch))
+                    raise
+                finally:
+                    db.close()
+                written += len(batch)
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="delivery-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        thread, self._thread = self._thread, None
+        self._stopping.set()
+        self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error escribiendo el registro de envíos al detener: {str(e)}")
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error escribiendo el registro de envíos: {str(e)}")
+
+
+delivery_log = DeliveryLog(
+    flush_interval=settings.DELIVERY_LOG_FLUSH_INTERVAL,
+    batch_size=settings.DELIVERY_LOG_BATCH_SIZE,
+    max_pending=settings.DELIVERY_LOG_MAX_PENDING,
+    recent_size=settings.RECENT_DELIVERIES_SIZE,
+)
@@ -0,0 +1,214 @@
+# app/core/dispatch.py
+import logging
+import os
+import random
+import smtplib
+import socket
+import threading
+import time
+from app.core.config import settings
+from app.core.delivery_log import smtp_response_code
+from app.core.email import enviar_email
+from app.crud import outbox as crud_outbox
+from app.db.model import EmailOutbox
+from app.db.session import SessionLocal
+from app.metrics.prometheus import EMAIL_OUTBOX_BACKLOG
+
+logger = logging.getLogger(__name__)
+
+
+# Fallos al abrir la sesión SMTP del pool (conexión, saludo, login): dependen de la
+# configuración o del servidor, no del mensaje, y afectan a todos los envíos por igual
+_SESSION_ERRORS = (smtplib.SMTPConnectError, smtplib.SMTPHeloError, smtplib.SMTPAuthenticationError)
+
+
+def is_permanent_failure(error: Exception) -> bool:
+    """
+    Un rechazo 5xx del destinatario o del mensaje no se resuelve reintentando. Los 4xx
+    (greylisting, buzón ocupado) y los fallos de sesión se reintentan con backoff.
+    """
+    if isinstance(error, _SESSION_ERRORS):
+        return False
+    code = smtp_response_code(error)
+    return code is not None and 500 <= code < 600
+
+
+class EmailDispatcher:
+    """
+    Pool de hilos que drena el outbox de correos (`email_outbox`) en segundo plano.
+
+    Los endpoints registran el mensaje en el outbox y responden de inmediato. Los
+    workers reclaman lotes de mensajes con `FOR UPDATE SKIP LOCKED` y un lease, por lo
+    que cualquier número de réplicas puede drenar el mismo outbox sin coordinador; si
+    un nodo cae, sus mensajes se reclaman cuando vence el lease. Los fallos
+    transitorios se reintentan con backoff exponencial y los que agotan
+    `max_attempts` o son rechazados definitivamente pasan a dead-letter. Los mensajes de
+    envíos masivos se reclaman sin superar `bulk_rate` mensajes por segundo entre todas
+    las réplicas.
+    """
+
+    def __init__(
+        self,
+        workers: int = 3,
+        batch_size: int = 10,
+        lease_seconds: float = 120.0,
+        poll_interval: float = 2.0,
+        max_attempts: int = 5,
+        backoff_base: float = 30.0,
+        backoff_max: float = 3600.0,
+        node_id: str | None = None,
+        backlog_interval: float = 15.0,
+        bulk_rate: float = 5.0,
+    ):
+        self.workers = workers
+        self.batch_size = batch_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Prefijo de los leases de este proceso (varios workers de uvicorn comparten host)
+        self.node_id = node_id or f"{socket.gethostname()}:{os.getpid()}"
+        self.backlog_interval = backlog_interval
+        self.bulk_rate = bulk_rate
+        # Alcanza para no perder presupuesto mientras un worker sin trabajo espera `poll_interval`
+        self.bulk_burst = max(float(batch_size), bulk_rate * poll_interval)
+        self._backlog_refreshed_at = 0.0
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._threads: list[threading.Thread] = []
+
+    def start(self):
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._worker, name=f"email-dispatch-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+        logger.info(f"Despachador de correos iniciado con {self.workers} workers")
+
+    def stop(self, timeout: float = 10.0):
+        with self._lock:
+            threads, self._threads = self._threads, []
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(
+        self,
+        kind: str,
+        recipient: str,
+        subject: str,
+        body: str,
+        html_content: str | None = None
+    ) -> EmailOutbox:
+        """
+        Registra el correo en el outbox y despierta a los workers
+        """
+        db = SessionLocal()
+        try:
+            message = crud_outbox.enqueue_email(db, kind, recipient, subject, body, html_content)
+        finally:
+            db.close()
+        self.wake()
+        return message
+
+    def wake(self):
+        """
+        Despierta a los workers para que reclamen los mensajes recién encolados
+        """
+        self._wakeup.set()
+
+    def get_job(self, job_id: int) -> EmailOutbox | None:
+        db = SessionLocal()
+        try:
+            return crud_outbox.get_message(db, job_id)
+        finally:
+            db.close()
+
+    def _retry_delay(self, attempts: int) -> float:
+        delay = min(self.backoff_base * (2 ** (attempts - 1)), self.backoff_max)
+        # Jitter para no reintentar todos los mensajes a la vez
+        return delay * random.uniform(0.8, 1.2)
+
+    def _refresh_backlog(self):
+        """
+        Actualiza el gauge del backlog del outbox; lo hace un solo worker cada `backlog_interval`
+        """
+        with self._lock:
+            now = time.monotonic()
+            if now - self._backlog_refreshed_at < self.backlog_interval:
+                return
+            self._backlog_refreshed_at = now
+        db = SessionLocal()
+        try:
+            for status, count in crud_outbox.count_backlog(db).items():
+                EMAIL_OUTBOX_BACKLOG.labels(status=status).set(count)
+        finally:
+            db.close()
+
+    def _worker(self):
+        while not self._stopping.is_set():
+            try:
+                self._refresh_backlog()
+                processed = self._process_batch()
+            except Exception as e:
+                logger.error(f"Error en el worker del outbox de correos: {str(e)}")
+                processed = 0
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _process_batch(self) -> int:
+        db = SessionLocal()
+        try:
+            # Los correos transaccionales primero; los masivos, dentro del presupuesto global
+            messages = crud_outbox.claim_batch(db, self.node_id, self.batch_size, self.lease_seconds)
+            if len(messages) < self.batch_size:
+                messages += crud_outbox.claim_bulk_batch(
+                    db, self.node_id, self.batch_size - len(messages), self.lease_seconds,
+                    self.bulk_rate, self.bulk_burst
+                )
+            for message in messages:
+                # El lease se reclamó para todo el lote, pero los envíos son secuenciales: se
+                # renueva antes de cada uno para que los últimos no se envíen ya vencido
+                if not crud_outbox.renew_lease(db, message.id, message.locked_by, self.lease_seconds):
+                    logger.warning(f"El lease del correo {message.id} venció antes de enviarlo; se omite")
+                    continue
+                self._process(db, message)
+            return len(messages)
+        finally:
+            db.close()
+
+    def _process(self, db, message: EmailOutbox):
+        try:
+            enviar_email(message.recipient, message.subject, message.body, message.html_body, tipo=message.kind)
+        except Exception as e:
+            if is_permanent_failure(e) or message.attempts >= self.max_attempts:
+                logger.error(f"Correo {message.id} a {message.recipient} movido a dead-letter: {str(e)}")
+                owned = crud_outbox.mark_failed(db, message.id, message.locked_by, str(e), retry_in=None)
+            else:
+                retry_in = self._retry_delay(message.attempts)
+                owned = crud_outbox.mark_failed(db, message.id, message.locked_by, str(e), retry_in=retry_in)
+        else:
+            owned = crud_outbox.mark_sent(db, message.id, message.locked_by)
+        if not owned:
+            logger.warning(f"El lease del correo {message.id} venció antes de terminar el envío")
+
+
+email_dispatcher = EmailDispatcher(
+    workers=settings.EMAIL_DISPATCH_WORKERS,
+    batch_size=settings.EMAIL_OUTBOX_BATCH_SIZE,
+    lease_seconds=settings.EMAIL_OUTBOX_LEASE_SECONDS,
+    poll_interval=settings.EMAIL_OUTBOX_POLL_INTERVAL,
+    max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+    backoff_base=settings.EMAIL_OUTBOX_BACKOFF_BASE,
+    backoff_max=settings.EMAIL_OUTBOX_BACKOFF_MAX,
+    node_id=settings.EMAIL_OUTBOX_NODE_ID,
+    backlog_interval=settings.EMAIL_OUTBOX_METRICS_INTERVAL,
+    bulk_rate=settings.BULK_EMAIL_RATE_PER_SECOND,
+)
@@ -1,19 +1,55 @@
 # app/core/email.py
-import smtplib
 import logging
+import time
 from email.message import EmailMessage
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from app.core.config import settings
+from app.core.smtp_pool import smtp_pool
+from app.core.stats import delivery_stats
+from app.core.delivery_log import delivery_log, smtp_response_code
+from app.db.model import EmailDeliveryOutcome
+from app.metrics.prometheus import EMAILS_TOTAL, EMAIL_DELIVERY_LATENCY, EMAIL_FAILURES
 
 # Configurar logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def enviar_email(destinatario: str, asunto: str, cuerpo: str, html_content: str | None = None):
+def clase_de_fallo(error: Exception) -> str:
     """
-    Envía un email simple con soporte para HTML
+    Clase del fallo para las métricas: 4xx (transitorio), 5xx (permanente) o connection
+    (el servidor no llegó a responder: timeout, conexión cerrada, pool agotado)
     """
+    code = smtp_response_code(error)
+    if code is None:
+        return "connection"
+    return f"{code // 100}xx"
+
+def _registrar_envio(tipo: str, destinatario: str, start: float, error: Exception | None):
+    """
+    Suma el intento a las estadísticas y métricas y lo agrega al registro de envíos
+    """
+    outcome = EmailDeliveryOutcome.sent.value if error is None else EmailDeliveryOutcome.failed.value
+    latency = time.perf_counter() - start
+    delivery_stats.record(tipo, outcome)
+    delivery_log.record(tipo, destinatario, outcome, latency * 1000, error)
+    EMAILS_TOTAL.labels(type=tipo, outcome=outcome).inc()
+    EMAIL_DELIVERY_LATENCY.labels(type=tipo).observe(latency)
+    if error is not None:
+        EMAIL_FAILURES.labels(type=tipo, code_class=clase_de_fallo(error)).inc()
+
+def enviar_email(
+    destinatario: str,
+    asunto: str,
+    cuerpo: str,
+    html_content: str | None = None,
+    tipo: str = "otro"
+):
+    """
+    Envía un email simple con soporte para HTML.
+    `tipo` (welcome, convocatoria, bulk) agrupa el resultado en las estadísticas de envío.
+    """
+    start = time.perf_counter()
     try:
         logger.info(f"Enviando email a {destinatario} con asunto: {asunto}")
         
@@ -36,19 +72,19 @@ def enviar_email(destinatario: str, asunto: str, cuerpo: str, html_content: str
             msg["To"] = destinatario
             msg.set_content(cuerpo)
 
-        with smtplib.SMTP_SSL("smtp.gmail.com", 465) as smtp:
-            smtp.login(settings.EMAIL_ADDRESS, settings.EMAIL_PASSWORD)
-            smtp.send_message(msg)
+        smtp_pool.send_message(msg)
             
         logger.info(f"Email enviado exitosamente a {destinatario}")
+        _registrar_envio(tipo, destinatario, start, None)
         
     except Exception as e:
         logger.error(f"Error al enviar email a {destinatario}: {str(e)}")
+        _registrar_envio(tipo, destinatario, start, e)
         raise
 
-def enviar_correo_confirmacion(destinatario: str, nombre_usuario: str):
+def construir_correo_confirmacion(nombre_usuario: str) -> tuple[str, str, str]:
     """
-    Envía un correo de confirmación a un usuario recién creado
+    Construye asunto, texto plano y HTML del correo de bienvenida
     """
     asunto = "¡Bienvenido a UnxChange!"
     
@@ -102,19 +138,25 @@ def enviar_correo_confirmacion(destinatario: str, nombre_usuario: str):
     </html>
     """
     
-    enviar_email(destinatario, asunto, cuerpo_texto, cuerpo_html)
+    return asunto, cuerpo_texto, cuerpo_html
 
-def enviar_correo_convocatoria_elegida(
-    destinatario: str, 
+def enviar_correo_confirmacion(destinatario: str, nombre_usuario: str):
+    """
+    Envía un correo de confirmación a un usuario recién creado
+    """
+    asunto, cuerpo_texto, cuerpo_html = construir_correo_confirmacion(nombre_usuario)
+    enviar_email(destinatario, asunto, cuerpo_texto, cuerpo_html, tipo="welcome")
+
+def construir_correo_convocatoria_elegida(
     nombre_usuario: str, 
     titulo_convocatoria: str,
     descripcion_convocatoria: str,
     universidad_destino: str,
     fecha_inicio: str,
     fecha_fin: str
-):
+) -> tuple[str, str, str]:
     """
-    Envía un correo de confirmación cuando un usuario elige una convocatoria
+    Construye asunto, texto plano y HTML del correo de postulación a una convocatoria
     """
     asunto = f"Confirmación de Postulación - {titulo_convocatoria}"
     
@@ -206,4 +248,26 @@ def enviar_correo_convocatoria_elegida(
     </html>
     """
     
-    enviar_email(destinatario, asunto, cuerpo_texto, cuerpo_html)
+    return asunto, cuerpo_texto, cuerpo_html
+
+def enviar_correo_convocatoria_elegida(
+    destinatario: str, 
+    nombre_usuario: str, 
+    titulo_convocatoria: str,
+    descripcion_convocatoria: str,
+    universidad_destino: str,
+    fecha_inicio: str,
+    fecha_fin: str
+):
+    """
+    Envía un correo de confirmación cuando un usuario elige una convocatoria
+    """
+    asunto, cuerpo_texto, cuerpo_html = construir_correo_convocatoria_elegida(
+        nombre_usuario,
+        titulo_convocatoria,
+        descripcion_convocatoria,
+        universidad_destino,
+        fecha_inicio,
+        fecha_fin
+    )
+    enviar_email(destinatario, asunto, cuerpo_texto, cuerpo_html, tipo="convocatoria")
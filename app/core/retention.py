@@ -0,0 +1,105 @@
+# app/core/retention.py
+import logging
+import threading
+from typing import Optional
+from sqlalchemy import text
+from app.core.config import settings
+from app.db import partitioning
+from app.db.session import engine
+
+logger = logging.getLogger(__name__)
+
+
+class NotificationPartitionMaintainer:
+    """
+    Mantenimiento periódico de las particiones mensuales de `notifications`.
+
+    Crea por adelantado las particiones de los próximos `months_ahead` meses y aplica
+    la retención eliminando (o desligando) particiones completas. Cada operación usa
+    su propia transacción con `lock_timeout`, para no quedar en cola detrás de
+    consultas largas mientras bloquea la tabla.
+    """
+
+    def __init__(
+        self,
+        interval: float = 3600.0,
+        months_ahead: int = 3,
+        retention_days: Optional[int] = None,
+        unread_retention_days: Optional[int] = None,
+        action: str = "drop",
+        lock_timeout: str = "5s",
+    ):
+        self.interval = interval
+        self.months_ahead = months_ahead
+        self.retention_days = retention_days
+        self.unread_retention_days = unread_retention_days
+        self.action = action
+        self.lock_timeout = lock_timeout
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._warned_unpartitioned = False
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="notification-partitions", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        thread, self._thread = self._thread, None
+        self._stopping.set()
+        if thread is not None:
+            thread.join(timeout)
+
+    def _set_lock_timeout(self, connection):
+        connection.execute(text(f"SET LOCAL lock_timeout = '{self.lock_timeout}'"))
+
+    def run_once(self) -> tuple[list[str], list[str]]:
+        """
+        Retorna (particiones creadas, particiones eliminadas o desligadas)
+        """
+        with engine.begin() as connection:
+            self._set_lock_timeout(connection)
+            if not partitioning.is_partitioned(connection):
+                if not self._warned_unpartitioned:
+                    logger.warning(
+                        "La tabla notifications no está particionada; ejecute "
+                        "`python -m app.db.partitioning migrate` para habilitar la retención"
+                    )
+                    self._warned_unpartitioned = True
+                return [], []
+            created = partitioning.ensure_partitions(connection, self.months_ahead)
+            expired = partitioning.expired_partitions(
+                connection, self.retention_days, self.unread_retention_days
+            )
+
+        removed = []
+        for partition in expired:
+            try:
+                with engine.begin() as connection:
+                    self._set_lock_timeout(connection)
+                    partitioning.remove_partition(connection, partition, self.action)
+                removed.append(partition)
+            except Exception as e:
+                logger.error(f"No se pudo aplicar la retención a {partition}: {str(e)}")
+        if created or removed:
+            logger.info(f"Particiones de notifications creadas: {created}; retención ({self.action}): {removed}")
+        return created, removed
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.error(f"Error en el mantenimiento de particiones: {str(e)}")
+            self._stopping.wait(self.interval)
+
+
+notification_partition_maintainer = NotificationPartitionMaintainer(
+    interval=settings.NOTIFICATIONS_PARTITION_MAINTENANCE_INTERVAL,
+    months_ahead=settings.NOTIFICATIONS_PARTITION_MONTHS_AHEAD,
+    retention_days=settings.NOTIFICATIONS_RETENTION_DAYS,
+    unread_retention_days=settings.NOTIFICATIONS_UNREAD_RETENTION_DAYS,
+    action=settings.NOTIFICATIONS_RETENTION_ACTION,
+)
@@ -0,0 +1,204 @@
+# app/core/smtp_pool.py
+import smtplib
+import logging
+import threading
+import time
+from collections import deque
+from app.core.config import settings
+from app.metrics.prometheus import SMTP_CONNECT_LATENCY, SMTP_LOGIN_LATENCY, SMTP_SEND_LATENCY, SMTP_IN_FLIGHT
+
+logger = logging.getLogger(__name__)
+
+
+class PooledConnection:
+    """
+    Sesión SMTP autenticada junto con los datos necesarios para decidir su reutilización
+    """
+    def __init__(self, smtp: smtplib.SMTP):
+        self.smtp = smtp
+        self.created_at = time.monotonic()
+        self.last_used = self.created_at
+        self.messages_sent = 0
+
+
+class SMTPConnectionPool:
+    """
+    Conjunto acotado de sesiones SMTP autenticadas que se reutilizan entre mensajes.
+
+    Evita el handshake TLS y el AUTH por cada correo. Las conexiones se crean bajo
+    demanda hasta `size`, se verifican con NOOP cuando llevan tiempo inactivas, se
+    descartan al superar `idle_timeout` o `max_messages` y se reconectan si el
+    servidor las cierra (SMTPServerDisconnected).
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: str,
+        password: str,
+        size: int = 3,
+        use_ssl: bool = True,
+        timeout: float = 30.0,
+        max_messages: int = 100,
+        idle_timeout: float = 120.0,
+        healthcheck_interval: float = 30.0,
+        checkout_timeout: float = 30.0,
+    ):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.max_messages = max_messages
+        self.idle_timeout = idle_timeout
+        self.healthcheck_interval = healthcheck_interval
+        self.checkout_timeout = checkout_timeout
+
+        # Conexiones libres (LIFO para reutilizar primero la más "caliente")
+        self._idle: deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        # Limita el número total de conexiones abiertas (libres + en uso)
+        self._slots = threading.BoundedSemaphore(size)
+
+    # ------------------------------------------------------------------
+    # Ciclo de vida de las conexiones
+    # ------------------------------------------------------------------
+    def _connect(self) -> PooledConnection:
+        with SMTP_CONNECT_LATENCY.time():
+            if self.use_ssl:
+                smtp = smtplib.SMTP_SSL(self.host, self.port, timeout=self.timeout)
+            else:
+                smtp = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+                smtp.starttls()
+        try:
+            with SMTP_LOGIN_LATENCY.time():
+                smtp.login(self.username, self.password)
+        except Exception:
+            self._close(smtp)
+            raise
+        logger.info(f"Nueva conexión SMTP abierta con {self.host}:{self.port}")
+        return PooledConnection(smtp)
+
+    @staticmethod
+    def _close(smtp: smtplib.SMTP):
+        try:
+            smtp.quit()
+        except Exception:
+            try:
+                smtp.close()
+            except Exception:
+                pass
+
+    def _is_healthy(self, conn: PooledConnection) -> bool:
+        idle_for = time.monotonic() - conn.last_used
+        if idle_for > self.idle_timeout:
+            return False
+        if idle_for > self.healthcheck_interval:
+            try:
+                code, _ = conn.smtp.noop()
+                return code == 250
+            except (smtplib.SMTPException, OSError):
+                return False
+        return True
+
+    def _acquire(self) -> PooledConnection:
+        if not self._slots.acquire(timeout=self.checkout_timeout):
+            raise TimeoutError("No hay conexiones SMTP disponibles en el pool")
+        try:
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    return self._connect()
+                if self._is_healthy(conn):
+                    return conn
+                self._close(conn.smtp)
+        except Exception:
+            self._slots.release()
+            raise
+
+    def _release(self, conn: PooledConnection):
+        conn.last_used = time.monotonic()
+        if conn.messages_sent >= self.max_messages:
+            self._close(conn.smtp)
+        else:
+            with self._lock:
+                self._idle.append(conn)
+        self._slots.release()
+
+    def _discard(self, conn: PooledConnection):
+        self._close(conn.smtp)
+        self._slots.release()
+
+    # ------------------------------------------------------------------
+    # API pública
+    # ------------------------------------------------------------------
+    def send_message(self, msg):
+        """
+        Envía un mensaje reutilizando una conexión del pool.
+        Si el servidor cerró la sesión se reintenta una vez con una conexión nueva.
+        """
+        for attempt in (1, 2):
+            conn = self._acquire()
+            try:
+                with SMTP_IN_FLIGHT.track_inprogress(), SMTP_SEND_LATENCY.time():
+                    conn.smtp.send_message(msg)
+            except smtplib.SMTPServerDisconnected:
+                self._discard(conn)
+                if attempt == 2:
+                    raise
+                logger.warning("Conexión SMTP cerrada por el servidor, reconectando")
+                continue
+            except (smtplib.SMTPRecipientsRefused, smtplib.SMTPResponseException):
+                self._release(conn)
+                raise
+            except Exception:
+                self._discard(conn)
+                raise
+            conn.messages_sent += 1
+            self._release(conn)
+            return
+
+    def warm_up(self, count: int | None = None):
+        """
+        Abre y autentica conexiones por adelantado para que los primeros envíos no paguen el handshake
+        """
+        count = self.size if count is None else min(count, self.size)
+        opened = []
+        try:
+            for _ in range(count):
+                opened.append(self._acquire())
+        except Exception as e:
+            logger.warning(f"No se pudo precalentar el pool SMTP: {str(e)}")
+        finally:
+            for conn in opened:
+                self._release(conn)
+        logger.info(f"Pool SMTP precalentado con {len(opened)} conexiones")
+
+    def close_all(self):
+        """
+        Cierra todas las conexiones libres (usado al apagar la aplicación)
+        """
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn.smtp)
+
+
+smtp_pool = SMTPConnectionPool(
+    host=settings.SMTP_HOST,
+    port=settings.SMTP_PORT,
+    username=settings.EMAIL_ADDRESS,
+    password=settings.EMAIL_PASSWORD,
+    size=settings.SMTP_POOL_SIZE,
+    use_ssl=settings.SMTP_USE_SSL,
+    timeout=settings.SMTP_TIMEOUT,
+    max_messages=settings.SMTP_POOL_MAX_MESSAGES_PER_CONNECTION,
+    idle_timeout=settings.SMTP_POOL_IDLE_TIMEOUT,
+    healthcheck_interval=settings.SMTP_POOL_HEALTHCHECK_INTERVAL,
+    checkout_timeout=settings.SMTP_POOL_CHECKOUT_TIMEOUT,
+)
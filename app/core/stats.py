@@ -0,0 +1,90 @@
+# app/core/stats.py
+import logging
+import threading
+from collections import Counter
+from datetime import date, datetime
+from app.core.config import settings
+from app.crud import stats as crud_stats
+from app.db.session import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+class DeliveryStatsRecorder:
+    """
+    Acumula en memoria los intentos de envío de correo por (día, tipo, resultado) y los
+    vuelca periódicamente a los rollups `email_delivery_stats` y `email_delivery_totals`.
+
+    Registrar un envío no toca la base de datos: cada volcado suma los contadores del
+    intervalo con un upsert por tabla, así que las estadísticas se consultan leyendo unas
+    pocas filas preagregadas sin importar cuánto historial haya. Si un volcado falla, los
+    contadores se conservan para el siguiente.
+    """
+
+    def __init__(self, flush_interval: float = 10.0):
+        self.flush_interval = flush_interval
+        self._counts: Counter[tuple[date, str, str]] = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def record(self, type: str, outcome: str):
+        key = (datetime.utcnow().date(), type, outcome)
+        with self._lock:
+            self._counts[key] += 1
+
+    def pending(self) -> dict[tuple[date, str, str], int]:
+        """
+        Contadores de este proceso aún no volcados a la base de datos
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def flush(self) -> int:
+        """
+        Vuelca los contadores acumulados y retorna el número de intentos volcados
+        """
+        with self._flush_lock:
+            with self._lock:
+                counts, self._counts = self._counts, Counter()
+            if not counts:
+                return 0
+            db = SessionLocal()
+            try:
+                crud_stats.add_delivery_counts(db, counts)
+            except Exception:
+                # Se devuelven al acumulador para reintentar en el próximo volcado
+                with self._lock:
+                    self._counts.update(counts)
+                raise
+            finally:
+                db.close()
+            return sum(counts.values())
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name="delivery-stats", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        thread, self._thread = self._thread, None
+        self._stopping.set()
+        if thread is not None:
+            thread.join(timeout)
+        try:
+            self.flush()
+        except Exception as e:
+            logger.error(f"Error volcando estadísticas de envío al detener: {str(e)}")
+
+    def _run(self):
+        while not self._stopping.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"Error volcando estadísticas de envío: {str(e)}")
+
+
+delivery_stats = DeliveryStatsRecorder(flush_interval=settings.EMAIL_STATS_FLUSH_INTERVAL)
@@ -0,0 +1,71 @@
+# app/crud/bulk.py
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import func, insert, literal, select
+from sqlalchemy.orm import Session
+from app.crud.user import user_filters
+from app.db.model import BulkEmailJob, EmailOutbox, EmailOutboxStatus, User
+
+def _enqueue_recipients_stmt(job_id: str, **filters):
+    # El asunto y el cuerpo quedan solo en bulk_email_jobs, no se copian en cada fila
+    now = datetime.utcnow()
+    audience = select(
+        literal("bulk"),
+        User.email,
+        literal(EmailOutboxStatus.pending.value),
+        literal(0),
+        literal(now),
+        literal(now),
+        literal(now),
+        literal(job_id)
+    ).where(*user_filters(**filters)).order_by(User.id)
+    return insert(EmailOutbox).from_select(
+        ["kind", "recipient", "status", "attempts",
+         "next_attempt_at", "created_at", "updated_at", "bulk_job_id"],
+        audience
+    )
+
+def create_job(db: Session, job_id: str, subject: str, body: str, **filters) -> BulkEmailJob:
+    """
+    Crea el envío masivo y encola en el outbox un mensaje por cada usuario que cumple los
+    filtros de audiencia con un solo `INSERT INTO email_outbox ... SELECT FROM users`, en
+    la misma transacción: o queda encolada toda la audiencia o nada.
+    """
+    job = BulkEmailJob(id=job_id, subject=subject, body=body, total=0, created_at=datetime.utcnow())
+    db.add(job)
+    db.flush()
+    job.total = db.execute(_enqueue_recipients_stmt(job_id, **filters)).rowcount
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: Session, job_id: str) -> Optional[BulkEmailJob]:
+    """
+    Retorna un envío masivo por su ID.
+    """
+    return db.get(BulkEmailJob, job_id)
+
+def count_job_messages(db: Session, job_id: str) -> dict[str, int]:
+    """
+    Cuenta los mensajes de un envío masivo por estado del outbox.
+    """
+    rows = db.query(EmailOutbox.status, func.count(EmailOutbox.id)).filter(
+        EmailOutbox.bulk_job_id == job_id
+    ).group_by(EmailOutbox.status).all()
+    return dict(rows)
+
+def get_job_failures(db: Session, job_id: str, offset: int = 0) -> list:
+    """
+    Retorna (email, error) de los destinatarios que fallaron definitivamente, en el orden
+    en que fallaron, a partir del `offset`-ésimo.
+    """
+    return db.query(EmailOutbox.recipient, EmailOutbox.last_error).filter(
+        EmailOutbox.bulk_job_id == job_id,
+        EmailOutbox.status == EmailOutboxStatus.dead.value
+    ).order_by(EmailOutbox.updated_at, EmailOutbox.id).offset(max(offset, 0)).all()
+
+def get_job_finished_at(db: Session, job_id: str) -> Optional[datetime]:
+    """
+    Momento en que se cerró el último mensaje de un envío masivo.
+    """
+    return db.query(func.max(EmailOutbox.updated_at)).filter(EmailOutbox.bulk_job_id == job_id).scalar()
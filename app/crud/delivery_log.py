@@ -0,0 +1,14 @@
+# app/crud/delivery_log.py
+from typing import Sequence
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from app.db.model import EmailDeliveryLog
+
+def add_entries(db: Session, entries: Sequence[dict]):
+    """
+    Inserta un lote de entradas del registro de envíos (INSERT multi-fila).
+    """
+    if not entries:
+        return
+    db.execute(insert(EmailDeliveryLog), list(entries))
+    db.commit()
@@ -0,0 +1,377 @@
+# app/crud/notification.py
+from datetime import datetime, timedelta
+from typing import Optional, Sequence
+from sqlalchemy import JSON, delete, false, func, insert, literal, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, with_expression
+from app.crud.user import user_filters
+from app.db.model import Notification, NotificationReadState, User
+
+def _read_watermark(user_id: int):
+    return select(NotificationReadState.last_read_all_at).where(
+        NotificationReadState.user_id == user_id
+    ).scalar_subquery()
+
+# Marca del dueño de cada fila (correlacionada), para cargar notificaciones sueltas
+_owner_read_watermark = select(NotificationReadState.last_read_all_at).where(
+    NotificationReadState.user_id == Notification.user_id
+).scalar_subquery()
+
+def _inbox_filters(user_id: int, unread_only: bool = False) -> list:
+    clauses = [Notification.user_id == user_id]
+    if unread_only:
+        # No leída: sin is_read y creada después de la marca "todas leídas" del usuario
+        clauses.append(Notification.is_read == False)
+        clauses.append(Notification.created_at > func.coalesce(_read_watermark(user_id), datetime.min))
+    return clauses
+
+def _list_notifications_stmt(
+    user_id: int,
+    unread_only: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[tuple[datetime, int]] = None
+):
+    stmt = select(Notification).where(*_inbox_filters(user_id, unread_only)).options(
+        with_expression(Notification.read_all_at, _read_watermark(user_id))
+    ).execution_options(populate_existing=True)
+    if after is not None:
+        # La comparación de filas no sirve para descartar particiones: la cota explícita
+        # sobre created_at excluye las particiones más recientes que el cursor
+        stmt = stmt.where(
+            Notification.created_at <= after[0],
+            tuple_(Notification.created_at, Notification.id) < after
+        )
+    stmt = stmt.order_by(Notification.created_at.desc(), Notification.id.desc())
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def _count_notifications_stmt(user_id: int, unread_only: bool = False):
+    return select(func.count(Notification.id)).where(*_inbox_filters(user_id, unread_only))
+
+def _mark_read_stmt(notification_ids: Sequence[int]):
+    # Devuelve todas las pedidas; las que ya estaban leídas conservan su read_at
+    return update(Notification).where(
+        Notification.id.in_(notification_ids)
+    ).values(
+        is_read=True, read_at=func.coalesce(Notification.read_at, datetime.utcnow())
+    ).returning(Notification)
+
+def _mark_all_read_stmt(user_id: int, watermark: datetime):
+    # Upsert de una fila; la marca nunca retrocede
+    stmt = pg_insert(NotificationReadState).values(
+        user_id=user_id, last_read_all_at=watermark, updated_at=watermark
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=[NotificationReadState.user_id],
+        set_={
+            "last_read_all_at": func.greatest(NotificationReadState.last_read_all_at, stmt.excluded.last_read_all_at),
+            "updated_at": stmt.excluded.updated_at
+        }
+    )
+
+def _get_notification_options() -> dict:
+    return {
+        "options": [with_expression(Notification.read_all_at, _owner_read_watermark)],
+        "populate_existing": True
+    }
+
+def _new_notification(
+    user_id: int,
+    type: str,
+    title: str,
+    message: str,
+    extra_data: Optional[dict] = None
+) -> Notification:
+    return Notification(
+        user_id=user_id,
+        type=type,
+        title=title,
+        message=message,
+        extra_data=extra_data or {},
+        is_read=False,
+        created_at=datetime.utcnow()
+    )
+
+def _notification_rows(items: Sequence[dict]) -> list[dict]:
+    created_at = datetime.utcnow()
+    return [
+        {
+            "user_id": item["user_id"],
+            "type": item["type"],
+            "title": item["title"],
+            "message": item["message"],
+            "extra_data": item.get("extra_data") or {},
+            "is_read": False,
+            "created_at": created_at
+        }
+        for item in items
+    ]
+
+def _insert_notifications_stmt():
+    # sort_by_parameter_order garantiza que RETURNING respete el orden de entrada
+    return insert(Notification).returning(Notification, sort_by_parameter_order=True)
+
+def _broadcast_stmt(type: str, title: str, message: str, extra_data: Optional[dict] = None, **filters):
+    audience = select(
+        User.id,
+        literal(type),
+        literal(title),
+        literal(message),
+        literal(extra_data or {}, JSON),
+        false(),
+        literal(datetime.utcnow())
+    ).where(*user_filters(**filters))
+    return insert(Notification).from_select(
+        ["user_id", "type", "title", "message", "extra_data", "is_read", "created_at"],
+        audience
+    )
+
+def list_notifications(
+    db: Session,
+    user_id: int,
+    unread_only: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[tuple[datetime, int]] = None
+):
+    """
+    Retorna las notificaciones de un usuario de la más reciente a la más antigua.
+    `after` es la clave (created_at, id) de la última fila de la página anterior.
+    """
+    return db.scalars(_list_notifications_stmt(user_id, unread_only, limit, after)).all()
+
+def count_notifications(db: Session, user_id: int, unread_only: bool = False) -> int:
+    """
+    Cuenta las notificaciones de un usuario con un `SELECT count(*)`.
+    """
+    return db.execute(_count_notifications_stmt(user_id, unread_only)).scalar()
+
+def get_notification(db: Session, notification_id: int):
+    """
+    Retorna una notificación por su ID.
+    """
+    return db.get(Notification, notification_id, **_get_notification_options())
+
+def create_notification(
+    db: Session,
+    user_id: int,
+    type: str,
+    title: str,
+    message: str,
+    extra_data: Optional[dict] = None
+) -> Notification:
+    """
+    Crea una notificación no leída para un usuario.
+    """
+    notification = _new_notification(user_id, type, title, message, extra_data)
+    db.add(notification)
+    db.commit()
+    db.refresh(notification)
+    return notification
+
+def create_notifications(db: Session, items: Sequence[dict]) -> list[Notification]:
+    """
+    Crea varias notificaciones en una sola transacción con `INSERT ... VALUES (...), (...) RETURNING`.
+    Cada elemento tiene user_id, type, title, message y opcionalmente extra_data.
+    Retorna las notificaciones creadas en el mismo orden de `items`.
+    """
+    if not items:
+        return []
+    notifications = db.scalars(_insert_notifications_stmt(), _notification_rows(items)).all()
+    # Se desligan antes del commit para que no expiren y no haga falta volver a leerlas
+    for notification in notifications:
+        db.expunge(notification)
+    db.commit()
+    return notifications
+
+def broadcast_notification(
+    db: Session,
+    type: str,
+    title: str,
+    message: str,
+    extra_data: Optional[dict] = None,
+    **filters
+) -> int:
+    """
+    Crea la misma notificación para todos los usuarios que cumplen los filtros de audiencia
+    (roles, email_domains, exclude_ids) con un solo `INSERT INTO notifications ... SELECT FROM users`.
+    Retorna el número de notificaciones creadas.
+    """
+    inserted = db.execute(_broadcast_stmt(type, title, message, extra_data, **filters)).rowcount
+    db.commit()
+    return inserted
+
+def mark_notification_read(db: Session, notification_id: int) -> Optional[Notification]:
+    """
+    Marca una notificación como leída con un solo `UPDATE ... RETURNING`. Retorna None si no existe.
+    """
+    notifications = mark_notifications_read(db, [notification_id])
+    return notifications[0] if notifications else None
+
+def mark_notifications_read(db: Session, notification_ids: Sequence[int]) -> list[Notification]:
+    """
+    Marca varias notificaciones como leídas con un solo `UPDATE ... WHERE id IN (...) RETURNING`.
+    Retorna las notificaciones actualizadas (los IDs inexistentes se omiten).
+    """
+    if not notification_ids:
+        return []
+    notifications = db.scalars(
+        _mark_read_stmt(notification_ids),
+        execution_options={"synchronize_session": False, "populate_existing": True}
+    ).all()
+    # Se desligan antes del commit para que no expiren y no haga falta volver a leerlas
+    for notification in notifications:
+        db.expunge(notification)
+    db.commit()
+    return notifications
+
+def mark_all_read(db: Session, user_id: int) -> datetime:
+    """
+    Marca como leídas todas las notificaciones actuales de un usuario moviendo su marca
+    "todas leídas" (upsert de una sola fila, sin tocar las notificaciones). Retorna la marca.
+    """
+    watermark = datetime.utcnow()
+    db.execute(_mark_all_read_stmt(user_id, watermark))
+    db.commit()
+    return watermark
+
+def delete_notification(db: Session, notification_id: int) -> Optional[Notification]:
+    """
+    Elimina una notificación y la retorna (None si no existe).
+    """
+    notification = db.get(Notification, notification_id)
+    if not notification:
+        return None
+    db.delete(notification)
+    db.commit()
+    return notification
+
+def _pending_read_watermarks_filter(min_age: float):
+    return NotificationReadState.updated_at < datetime.utcnow() - timedelta(seconds=min_age)
+
+def pending_read_watermarks(db: Session, min_age: float, limit: int = 100) -> list:
+    """
+    Retorna (user_id, last_read_all_at) de las marcas "todas leídas" con al menos `min_age`
+    segundos, pendientes de aplicar a las filas de notificaciones.
+    """
+    return db.execute(
+        select(NotificationReadState.user_id, NotificationReadState.last_read_all_at).where(
+            _pending_read_watermarks_filter(min_age)
+        ).order_by(NotificationReadState.updated_at).limit(limit)
+    ).all()
+
+def count_pending_read_watermarks(db: Session, min_age: float) -> int:
+    """
+    Cuenta las marcas "todas leídas" con al menos `min_age` segundos pendientes de aplicar.
+    """
+    return db.execute(
+        select(func.count()).select_from(NotificationReadState).where(_pending_read_watermarks_filter(min_age))
+    ).scalar()
+
+def compact_read_watermark(db: Session, user_id: int, watermark: datetime, batch_size: int = 1000) -> int:
+    """
+    Aplica la marca "todas leídas" a las filas del usuario (is_read = true) en lotes de
+    `batch_size` por transacción y elimina la marca si no cambió entretanto.
+    Retorna el número de filas actualizadas.
+    """
+    total = 0
+    while True:
+        batch = select(Notification.id).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False,
+            Notification.created_at <= watermark
+        ).limit(batch_size)
+        updated = db.execute(
+            update(Notification).where(Notification.id.in_(batch)).values(is_read=True, read_at=watermark),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        db.commit()
+        total += updated
+        if updated < batch_size:
+            break
+    db.execute(delete(NotificationReadState).where(
+        NotificationReadState.user_id == user_id,
+        NotificationReadState.last_read_all_at == watermark
+    ))
+    db.commit()
+    return total
+
+# ----------------------------------------------------------------------
+# Versiones asíncronas (AsyncSession), mismas consultas que las síncronas
+# ----------------------------------------------------------------------
+async def list_notifications_async(
+    db: AsyncSession,
+    user_id: int,
+    unread_only: bool = False,
+    limit: Optional[int] = None,
+    after: Optional[tuple[datetime, int]] = None
+):
+    return (await db.scalars(_list_notifications_stmt(user_id, unread_only, limit, after))).all()
+
+async def count_notifications_async(db: AsyncSession, user_id: int, unread_only: bool = False) -> int:
+    return (await db.execute(_count_notifications_stmt(user_id, unread_only))).scalar()
+
+async def get_notification_async(db: AsyncSession, notification_id: int):
+    return await db.get(Notification, notification_id, **_get_notification_options())
+
+async def create_notification_async(
+    db: AsyncSession,
+    user_id: int,
+    type: str,
+    title: str,
+    message: str,
+    extra_data: Optional[dict] = None
+) -> Notification:
+    notification = _new_notification(user_id, type, title, message, extra_data)
+    db.add(notification)
+    await db.commit()
+    await db.refresh(notification)
+    return notification
+
+async def create_notifications_async(db: AsyncSession, items: Sequence[dict]) -> list[Notification]:
+    if not items:
+        return []
+    notifications = (await db.scalars(_insert_notifications_stmt(), _notification_rows(items))).all()
+    await db.commit()
+    return notifications
+
+async def broadcast_notification_async(
+    db: AsyncSession,
+    type: str,
+    title: str,
+    message: str,
+    extra_data: Optional[dict] = None,
+    **filters
+) -> int:
+    inserted = (await db.execute(_broadcast_stmt(type, title, message, extra_data, **filters))).rowcount
+    await db.commit()
+    return inserted
+
+async def mark_notification_read_async(db: AsyncSession, notification_id: int) -> Optional[Notification]:
+    notifications = await mark_notifications_read_async(db, [notification_id])
+    return notifications[0] if notifications else None
+
+async def mark_notifications_read_async(db: AsyncSession, notification_ids: Sequence[int]) -> list[Notification]:
+    if not notification_ids:
+        return []
+    notifications = (await db.scalars(
+        _mark_read_stmt(notification_ids),
+        execution_options={"synchronize_session": False, "populate_existing": True}
+    )).all()
+    await db.commit()
+    return notifications
+
+async def mark_all_read_async(db: AsyncSession, user_id: int) -> datetime:
+    watermark = datetime.utcnow()
+    await db.execute(_mark_all_read_stmt(user_id, watermark))
+    await db.commit()
+    return watermark
+
+async def delete_notification_async(db: AsyncSession, notification_id: int) -> Optional[Notification]:
+    notification = await db.get(Notification, notification_id)
+    if not notification:
+        return None
+    await db.delete(notification)
+    await db.commit()
+    return notification
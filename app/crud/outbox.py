@@ -0,0 +1,213 @@
+# app/crud/outbox.py
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.db.model import BulkEmailJob, EmailOutbox, EmailOutboxStatus, EmailRateBucket
+
+# Token bucket del presupuesto de envíos masivos
+BULK_RATE_BUCKET = "bulk"
+
+def enqueue_email(
+    db: Session,
+    kind: str,
+    recipient: str,
+    subject: str,
+    body: str,
+    html_body: str | None = None
+) -> EmailOutbox:
+    """
+    Registra un correo pendiente de envío en el outbox.
+    """
+    message = EmailOutbox(
+        kind=kind,
+        recipient=recipient,
+        subject=subject,
+        body=body,
+        html_body=html_body,
+        status=EmailOutboxStatus.pending.value,
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(message)
+    db.commit()
+    db.refresh(message)
+    return message
+
+def get_message(db: Session, message_id: int):
+    """
+    Retorna un mensaje del outbox por su ID.
+    """
+    return db.query(EmailOutbox).filter(EmailOutbox.id == message_id).first()
+
+def _claim(db: Session, node_id: str, limit: int, lease_seconds: float, bulk: bool) -> list[EmailOutbox]:
+    now = datetime.utcnow()
+    if bulk:
+        # El asunto y el cuerpo de los envíos masivos se guardan una sola vez en bulk_email_jobs
+        query = db.query(EmailOutbox, BulkEmailJob.subject, BulkEmailJob.body).join(
+            BulkEmailJob, BulkEmailJob.id == EmailOutbox.bulk_job_id
+        )
+    else:
+        query = db.query(EmailOutbox).filter(EmailOutbox.bulk_job_id.is_(None))
+    rows = query.filter(
+        or_(
+            and_(
+                EmailOutbox.status == EmailOutboxStatus.pending.value,
+                EmailOutbox.next_attempt_at <= now
+            ),
+            and_(
+                EmailOutbox.status == EmailOutboxStatus.sending.value,
+                EmailOutbox.locked_until < now
+            )
+        )
+    ).order_by(
+        EmailOutbox.next_attempt_at, EmailOutbox.id
+    ).limit(limit).with_for_update(of=EmailOutbox, skip_locked=True).all()
+    messages = [row[0] for row in rows] if bulk else rows
+
+    lease_expires = now + timedelta(seconds=lease_seconds)
+    # Token propio de este reclamo: otro hilo del mismo proceso que vuelva a reclamar un
+    # mensaje con el lease vencido obtiene un token distinto
+    lease = f"{node_id}:{uuid.uuid4().hex}"
+    for message in messages:
+        message.status = EmailOutboxStatus.sending.value
+        message.locked_by = lease
+        message.locked_until = lease_expires
+        message.attempts += 1
+        message.updated_at = now
+    db.flush()
+    for message in messages:
+        db.expunge(message)
+    if bulk:
+        # Solo en la copia desligada: la fila del outbox sigue sin asunto ni cuerpo
+        for message, subject, body in rows:
+            message.subject, message.body = subject, body
+    return messages
+
+def claim_batch(db: Session, node_id: str, batch_size: int, lease_seconds: float) -> list[EmailOutbox]:
+    """
+    Reclama un lote de mensajes listos para enviar y los marca como `sending` con un lease.
+
+    Usa `SELECT ... FOR UPDATE SKIP LOCKED`, de modo que varias réplicas pueden consumir
+    el outbox en paralelo sin coordinarse ni enviar dos veces el mismo mensaje. También
+    se reclaman los mensajes cuyo lease venció (nodo caído a mitad de envío).
+    `locked_by` de cada mensaje devuelto es el token del lease, que se pasa a
+    `renew_lease`, `mark_sent` y `mark_failed`. No incluye los mensajes de envíos masivos (ver `claim_bulk_batch`).
+    Los mensajes se devuelven desligados de la sesión.
+    """
+    messages = _claim(db, node_id, batch_size, lease_seconds, bulk=False)
+    db.commit()
+    return messages
+
+def _lock_rate_bucket(db: Session, name: str, burst: float) -> EmailRateBucket:
+    bucket = db.query(EmailRateBucket).filter(EmailRateBucket.name == name).with_for_update().first()
+    if bucket is None:
+        db.execute(pg_insert(EmailRateBucket).values(
+            name=name, tokens=burst, updated_at=datetime.utcnow()
+        ).on_conflict_do_nothing())
+        bucket = db.query(EmailRateBucket).filter(EmailRateBucket.name == name).with_for_update().one()
+    return bucket
+
+def claim_bulk_batch(
+    db: Session,
+    node_id: str,
+    batch_size: int,
+    lease_seconds: float,
+    rate: float,
+    burst: float
+) -> list[EmailOutbox]:
+    """
+    Igual que `claim_batch` para los mensajes de envíos masivos, pero limitado por un
+    token bucket de `rate` mensajes por segundo guardado en `email_rate_buckets`: el
+    bucket se bloquea en la misma transacción del reclamo, así que el presupuesto es
+    global para todas las réplicas y workers. Con `rate` <= 0 no hay límite.
+    """
+    bucket = None
+    if rate > 0:
+        bucket = _lock_rate_bucket(db, BULK_RATE_BUCKET, burst)
+        now = datetime.utcnow()
+        elapsed = max((now - bucket.updated_at).total_seconds(), 0.0)
+        tokens = min(burst, bucket.tokens + elapsed * rate)
+        batch_size = min(batch_size, int(tokens))
+    messages = _claim(db, node_id, batch_size, lease_seconds, bulk=True) if batch_size > 0 else []
+    if bucket is not None:
+        bucket.tokens = tokens - len(messages)
+        bucket.updated_at = now
+    db.commit()
+    db.expunge_all()
+    return messages
+
+def renew_lease(db: Session, message_id: int, lease: str, lease_seconds: float) -> bool:
+    """
+    Extiende el lease de un mensaje reclamado justo antes de enviarlo. Retorna False si
+    el lease ya venció y otro worker lo reclamó, en cuyo caso no se debe enviar.
+    """
+    now = datetime.utcnow()
+    updated = db.query(EmailOutbox).filter(
+        EmailOutbox.id == message_id,
+        EmailOutbox.status == EmailOutboxStatus.sending.value,
+        EmailOutbox.locked_by == lease
+    ).update({
+        "locked_until": now + timedelta(seconds=lease_seconds),
+        "updated_at": now
+    }, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+def count_backlog(db: Session) -> dict[str, int]:
+    """
+    Cuenta los mensajes por enviar: `pending` (listos), `retry` (esperando su próximo
+    reintento) y `sending` (reclamados por un worker).
+    """
+    now = datetime.utcnow()
+    bucket = case(
+        (EmailOutbox.status == EmailOutboxStatus.sending.value, "sending"),
+        (EmailOutbox.next_attempt_at > now, "retry"),
+        else_="pending"
+    )
+    rows = db.query(bucket, func.count(EmailOutbox.id)).filter(
+        EmailOutbox.status.in_([EmailOutboxStatus.pending.value, EmailOutboxStatus.sending.value])
+    ).group_by(bucket).all()
+    counts = {"pending": 0, "retry": 0, "sending": 0}
+    counts.update(dict(rows))
+    return counts
+
+def _update_owned(db: Session, message_id: int, lease: str, values: dict) -> bool:
+    # Solo el dueño del lease puede cerrar el mensaje; si el lease venció y otro worker
+    # lo reclamó, la actualización no afecta ninguna fila
+    updated = db.query(EmailOutbox).filter(
+        EmailOutbox.id == message_id,
+        EmailOutbox.status == EmailOutboxStatus.sending.value,
+        EmailOutbox.locked_by == lease
+    ).update({
+        **values,
+        "locked_by": None,
+        "locked_until": None,
+        "updated_at": datetime.utcnow()
+    }, synchronize_session=False)
+    db.commit()
+    return bool(updated)
+
+def mark_sent(db: Session, message_id: int, lease: str) -> bool:
+    """
+    Marca un mensaje como enviado.
+    """
+    return _update_owned(db, message_id, lease, {
+        "status": EmailOutboxStatus.sent.value,
+        "sent_at": datetime.utcnow(),
+        "last_error": None
+    })
+
+def mark_failed(db: Session, message_id: int, lease: str, error: str, retry_in: float | None) -> bool:
+    """
+    Registra un intento fallido. Con `retry_in` se reprograma; sin él pasa a dead-letter.
+    """
+    if retry_in is None:
+        values = {"status": EmailOutboxStatus.dead.value}
+    else:
+        values = {
+            "status": EmailOutboxStatus.pending.value,
+            "next_attempt_at": datetime.utcnow() + timedelta(seconds=retry_in)
+        }
+    values["last_error"] = error[:1000]
+    return _update_owned(db, message_id, lease, values)
@@ -0,0 +1,62 @@
+# app/crud/stats.py
+from datetime import date
+from typing import Mapping
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from app.db.model import EmailDeliveryStat, EmailDeliveryTotal
+
+def _increment_stmt(model, rows: list[dict], keys: list):
+    # Upsert que suma al contador existente
+    stmt = pg_insert(model).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=keys,
+        set_={"count": model.count + stmt.excluded.count}
+    )
+
+def add_delivery_counts(db: Session, counts: Mapping[tuple[date, str, str], int]):
+    """
+    Suma los intentos de envío acumulados, con claves (día, tipo, resultado), al rollup
+    diario y a los totales históricos en una sola transacción.
+    """
+    if not counts:
+        return
+    totals: dict[tuple[str, str], int] = {}
+    for (_, type, outcome), count in counts.items():
+        totals[(type, outcome)] = totals.get((type, outcome), 0) + count
+    # Filas en orden fijo para que dos réplicas que vuelcan a la vez no se bloqueen mutuamente
+    db.execute(_increment_stmt(
+        EmailDeliveryStat,
+        [
+            {"day": day, "type": type, "outcome": outcome, "count": count}
+            for (day, type, outcome), count in sorted(counts.items())
+        ],
+        [EmailDeliveryStat.day, EmailDeliveryStat.type, EmailDeliveryStat.outcome]
+    ))
+    db.execute(_increment_stmt(
+        EmailDeliveryTotal,
+        [
+            {"type": type, "outcome": outcome, "count": count}
+            for (type, outcome), count in sorted(totals.items())
+        ],
+        [EmailDeliveryTotal.type, EmailDeliveryTotal.outcome]
+    ))
+    db.commit()
+
+def get_daily_delivery_counts(db: Session, day: date) -> list:
+    """
+    Retorna (tipo, resultado, cantidad) de los envíos de un día.
+    """
+    return db.execute(
+        select(EmailDeliveryStat.type, EmailDeliveryStat.outcome, EmailDeliveryStat.count).where(
+            EmailDeliveryStat.day == day
+        )
+    ).all()
+
+def get_total_delivery_counts(db: Session) -> list:
+    """
+    Retorna (tipo, resultado, cantidad) de los envíos históricos.
+    """
+    return db.execute(
+        select(EmailDeliveryTotal.type, EmailDeliveryTotal.outcome, EmailDeliveryTotal.count)
+    ).all()
@@ -1,6 +1,9 @@
 # app/crud/usuario.py
+from typing import Optional, Sequence
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.db.model import User
+from app.db.model import User, email_domain
 
 def obtener_emails(db: Session):
     return [usuario.email for usuario in db.query(User).all()]
@@ -16,3 +19,112 @@ def get_user_by_id(db: Session, user_id: int):
     Retorna un usuario por su ID.
     """
     return db.query(User).filter(User.id == user_id).first()
+
+def _public_columns():
+    return select(User.id, User.name, User.email, User.role)
+
+def get_users_by_ids(db: Session, user_ids: Sequence[int]):
+    """
+    Retorna las columnas públicas de varios usuarios en una sola consulta `WHERE id IN (...)`.
+    """
+    if not user_ids:
+        return []
+    return db.execute(_public_columns().where(User.id.in_(user_ids))).all()
+
+def normalize_domain(domain: str) -> str:
+    """
+    Normaliza un dominio de email ("@UNAL.edu.co" -> "unal.edu.co").
+    """
+    return domain.strip().lower().lstrip("@")
+
+def user_filters(
+    roles: Optional[Sequence[str]] = None,
+    email_domains: Optional[Sequence[str]] = None,
+    exclude_ids: Optional[Sequence[int]] = None
+) -> list:
+    """
+    Compila los filtros de audiencia (roles, dominios de email, IDs excluidos) a condiciones SQL.
+    """
+    clauses = []
+    if roles:
+        clauses.append(User.role.in_(roles))
+    if email_domains:
+        # Coincidencia exacta del dominio, resuelta con el índice de expresión ix_users_email_domain
+        clauses.append(email_domain(User.email).in_([normalize_domain(domain) for domain in email_domains]))
+    if exclude_ids:
+        clauses.append(User.id.notin_(exclude_ids))
+    return clauses
+
+def _count_users_stmt(**filters):
+    return select(func.count(User.id)).where(*user_filters(**filters))
+
+def count_users(db: Session, **filters) -> int:
+    """
+    Cuenta los usuarios que cumplen los filtros con un `SELECT count(*)`.
+    """
+    return db.execute(_count_users_stmt(**filters)).scalar()
+
+def _preview_users_stmt(limit: int, **filters):
+    return _public_columns().where(*user_filters(**filters)).order_by(User.id).limit(limit)
+
+def preview_users(db: Session, limit: int = 5, **filters):
+    """
+    Retorna los primeros `limit` usuarios que cumplen los filtros (solo columnas públicas).
+    """
+    return db.execute(_preview_users_stmt(limit, **filters)).all()
+
+def _list_users_stmt(
+    role: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+):
+    stmt = _public_columns().where(
+        *user_filters(
+            roles=[role] if role else None,
+            email_domains=[email_domain] if email_domain else None
+        )
+    )
+    if after_id is not None:
+        stmt = stmt.where(User.id > after_id)
+    stmt = stmt.order_by(User.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def list_users(
+    db: Session,
+    role: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+):
+    """
+    Retorna las columnas públicas de los usuarios filtrando, ordenando y limitando en SQL.
+    `after_id` permite paginación por keyset sobre `id`.
+    """
+    return db.execute(_list_users_stmt(role, email_domain, limit, after_id)).all()
+
+# ----------------------------------------------------------------------
+# Versiones asíncronas (AsyncSession), mismas consultas que las síncronas
+# ----------------------------------------------------------------------
+async def get_users_by_ids_async(db: AsyncSession, user_ids: Sequence[int]):
+    if not user_ids:
+        return []
+    return (await db.execute(_public_columns().where(User.id.in_(user_ids)))).all()
+
+async def count_users_async(db: AsyncSession, **filters) -> int:
+    return (await db.execute(_count_users_stmt(**filters))).scalar()
+
+async def preview_users_async(db: AsyncSession, limit: int = 5, **filters):
+    return (await db.execute(_preview_users_stmt(limit, **filters))).all()
+
+async def list_users_async(
+    db: AsyncSession,
+    role: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[int] = None
+):
+    return (await db.execute(_list_users_stmt(role, email_domain, limit, after_id))).all()
+
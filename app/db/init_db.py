@@ -0,0 +1,44 @@
+# app/db/init_db.py
+from sqlalchemy import inspect, text
+from app.core.config import settings
+from .session import Base, engine
+from . import partitioning
+from .model import (
+    Notification, NotificationReadState, EmailOutbox, EmailDeliveryStat, EmailDeliveryTotal,
+    EmailDeliveryLog, BulkEmailJob, EmailRateBucket, ix_users_email_domain
+)
+
+def init_db():
+    """
+    Crea las tablas propias del servicio que aún no existan, junto con los índices
+    que falten en tablas ya existentes.
+    La tabla `users` pertenece al microservicio de autenticación: aquí solo se le
+    agregan los índices que necesitan las consultas de este servicio.
+    Con NOTIFICATIONS_PARTITIONED, `notifications` se crea particionada por mes
+    (ver app/db/partitioning.py).
+    """
+    tables = [
+        Notification.__table__, NotificationReadState.__table__, EmailOutbox.__table__,
+        EmailDeliveryStat.__table__, EmailDeliveryTotal.__table__, EmailDeliveryLog.__table__,
+        BulkEmailJob.__table__, EmailRateBucket.__table__
+    ]
+    with engine.begin() as connection:
+        if settings.NOTIFICATIONS_PARTITIONED and not inspect(connection).has_table(Notification.__tablename__):
+            partitioning.create_partitioned_table(connection, settings.NOTIFICATIONS_PARTITION_MONTHS_AHEAD)
+        # Cambios posteriores a la creación del outbox en instalaciones existentes
+        if inspect(connection).has_table(EmailOutbox.__tablename__):
+            connection.execute(text(
+                "ALTER TABLE email_outbox ADD COLUMN IF NOT EXISTS bulk_job_id varchar,"
+                " ALTER COLUMN subject DROP NOT NULL, ALTER COLUMN body DROP NOT NULL"
+            ))
+    # CREATE INDEX CONCURRENTLY no puede ejecutarse dentro de una transacción
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        Base.metadata.create_all(bind=connection, tables=tables)
+        partitioned = partitioning.is_partitioned(connection)
+        for table in tables:
+            # Los índices de la tabla particionada los crea partitioning (no admiten CONCURRENTLY)
+            if partitioned and table is Notification.__table__:
+                continue
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+        ix_users_email_domain.create(connection, checkfirst=True)
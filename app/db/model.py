@@ -1,5 +1,6 @@
 # app/db/models.py
-from sqlalchemy import Column, Integer, String, Enum, Boolean, DateTime, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, Enum, Boolean, Date, DateTime, Float, JSON, Index, func, literal_column
+from sqlalchemy.orm import query_expression
 from datetime import datetime
 from .session import Base
 import enum
@@ -9,6 +10,14 @@ class UserRole(str, enum.Enum):
     profesional = "profesional"
     administrador = "administrador"
 
+def email_domain(email_column):
+    """
+    Expresión SQL del dominio (en minúsculas) de un email; la usa el índice `ix_users_email_domain`
+    """
+    # Literales en línea (no parámetros) para que la expresión coincida con la del índice
+    # también con sentencias preparadas
+    return func.lower(func.split_part(email_column, literal_column("'@'"), literal_column("2")))
+
 class User(Base):
     __tablename__ = "users"
 
@@ -20,6 +29,14 @@ class User(Base):
     # role = Column(Enum(UserRole), nullable=False, default=UserRole.estudiante)
     # Podríamos añadir más campos como: full_name, is_active, etc.
 
+# Índice de expresión sobre el dominio del email en minúsculas: permite que los filtros
+# por dominio sean búsquedas por índice en lugar de `LIKE '%@dominio'` (full scan)
+ix_users_email_domain = Index(
+    "ix_users_email_domain",
+    email_domain(User.email),
+    postgresql_concurrently=True
+)
+
 class Notification(Base):
     __tablename__ = "notifications"
 
@@ -31,4 +48,146 @@ class Notification(Base):
     is_read = Column(Boolean, default=False, nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     read_at = Column(DateTime, nullable=True)
-    extra_data = Column(JSON, nullable=True)  # Additional data as JSON (changed from metadata)
\ No newline at end of file
+    extra_data = Column(JSON, nullable=True)  # Additional data as JSON (changed from metadata)
+    # Marca "todas leídas" del usuario (NotificationReadState); la cargan las consultas con with_expression
+    read_all_at = query_expression()
+
+    __table_args__ = (
+        # Bandeja de entrada: notificaciones de un usuario en orden (created_at, id) descendente
+        Index(
+            "ix_notifications_user_created",
+            "user_id", created_at.desc(), id.desc(),
+            postgresql_concurrently=True
+        ),
+        # Índice parcial solo con las no leídas: bandeja de no leídas y conteos
+        Index(
+            "ix_notifications_user_unread",
+            "user_id", created_at.desc(), id.desc(),
+            postgresql_where=(is_read == False),
+            postgresql_concurrently=True
+        ),
+    )
+
+    @property
+    def effective_is_read(self) -> bool:
+        """Leída por sí misma o cubierta por la marca "todas leídas" del usuario"""
+        return self.is_read or (self.read_all_at is not None and self.created_at <= self.read_all_at)
+
+    @property
+    def effective_read_at(self):
+        if self.is_read:
+            return self.read_at
+        return self.read_all_at if self.effective_is_read else None
+
+class NotificationReadState(Base):
+    """
+    Marca de "todas leídas" por usuario: las notificaciones creadas hasta `last_read_all_at`
+    cuentan como leídas aunque su fila siga con is_read = false. Marcar todo como leído
+    es un upsert de una fila; un proceso en segundo plano aplica la marca a las filas
+    y luego la elimina.
+    """
+    __tablename__ = "notification_read_state"
+
+    user_id = Column(Integer, primary_key=True)
+    last_read_all_at = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+
+class EmailOutboxStatus(str, enum.Enum):
+    pending = "pending"   # Esperando envío (o reintento)
+    sending = "sending"   # Reclamado por un worker (hasta que venza `locked_until`)
+    sent = "sent"
+    dead = "dead"         # Falló definitivamente (dead-letter)
+
+class BulkEmailJob(Base):
+    """
+    Envío masivo. Cada destinatario es un mensaje del outbox con `bulk_job_id`, así que
+    el progreso se lee del outbox y sobrevive a reinicios y se consulta desde cualquier réplica.
+    """
+    __tablename__ = "bulk_email_jobs"
+
+    id = Column(String, primary_key=True)  # uuid hex
+    subject = Column(String, nullable=False)
+    body = Column(Text, nullable=False)  # Se guarda una vez; los mensajes del outbox lo toman al reclamarse
+    total = Column(Integer, nullable=False)  # destinatarios encolados
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+class EmailRateBucket(Base):
+    """
+    Token bucket compartido por todas las réplicas (p. ej. el presupuesto de envíos masivos)
+    """
+    __tablename__ = "email_rate_buckets"
+
+    name = Column(String, primary_key=True)
+    tokens = Column(Float, nullable=False)
+    updated_at = Column(DateTime, nullable=False)
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False)  # welcome, convocatoria, bulk
+    recipient = Column(String, nullable=False)
+    # NULL en los mensajes de envíos masivos: se toman de BulkEmailJob al reclamarlos
+    subject = Column(String, nullable=True)
+    body = Column(Text, nullable=True)
+    html_body = Column(Text, nullable=True)
+    status = Column(String, nullable=False, default=EmailOutboxStatus.pending.value)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_error = Column(String, nullable=True)
+    locked_by = Column(String, nullable=True)  # Token del lease: "<nodo>:<uuid>" de cada reclamo
+    locked_until = Column(DateTime, nullable=True)  # Vencimiento del lease
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+    bulk_job_id = Column(String, nullable=True)  # Envío masivo al que pertenece (ver BulkEmailJob)
+
+    __table_args__ = (
+        # Búsqueda de mensajes pendientes cuyo reintento ya venció
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        # Búsqueda de leases vencidos de nodos caídos
+        Index("ix_email_outbox_status_locked_until", "status", "locked_until"),
+        # Progreso y fallos de un envío masivo
+        Index("ix_email_outbox_bulk_job_status", "bulk_job_id", "status"),
+    )
+
+class EmailDeliveryOutcome(str, enum.Enum):
+    sent = "sent"
+    failed = "failed"
+
+class EmailDeliveryStat(Base):
+    """
+    Rollup diario de intentos de envío de correo por tipo y resultado. Los contadores se
+    incrementan con upserts (ver app/core/stats.py); nunca se recorre el historial.
+    """
+    __tablename__ = "email_delivery_stats"
+
+    day = Column(Date, primary_key=True)  # día UTC
+    type = Column(String, primary_key=True)  # welcome, convocatoria, bulk
+    outcome = Column(String, primary_key=True)  # sent, failed
+    count = Column(BigInteger, nullable=False, default=0)
+
+class EmailDeliveryTotal(Base):
+    """
+    Totales históricos de intentos de envío por tipo y resultado (mismo upsert que el rollup diario)
+    """
+    __tablename__ = "email_delivery_totals"
+
+    type = Column(String, primary_key=True)
+    outcome = Column(String, primary_key=True)
+    count = Column(BigInteger, nullable=False, default=0)
+
+class EmailDeliveryLog(Base):
+    """
+    Un registro por intento de envío de correo; se escribe por lotes (ver app/core/delivery_log.py)
+    """
+    __tablename__ = "email_delivery_log"
+
+    id = Column(BigInteger, primary_key=True)
+    type = Column(String, nullable=False)  # welcome, convocatoria, bulk
+    recipient = Column(String, nullable=False)
+    status = Column(String, nullable=False)  # sent, failed
+    smtp_code = Column(Integer, nullable=True)  # 250 si se aceptó; None si falló sin respuesta del servidor
+    latency_ms = Column(Float, nullable=False)
+    error = Column(String, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
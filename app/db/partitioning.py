@@ -0,0 +1,270 @@
+# app/db/partitioning.py
+"""
+Particionado nativo de PostgreSQL para `notifications`: particiones mensuales por
+rango de `created_at` (`notifications_pYYYYMM`).
+
+Las consultas de la bandeja filtran por usuario y ordenan por `created_at`, el orden
+de las particiones: PostgreSQL las recorre de la más reciente a la más antigua (Append
+ordenado) y deja de leer en cuanto completa la página, y las páginas siguientes
+descartan por `created_at` las particiones posteriores al cursor. Aun así cada
+consulta planifica y bloquea todas las particiones restantes, así que su costo crece
+con el número de particiones: sin retención (`NOTIFICATIONS_RETENTION_DAYS` o
+`NOTIFICATIONS_UNREAD_RETENTION_DAYS`) ese número crece indefinidamente. La retención
+elimina particiones completas (DROP/DETACH) en vez de borrar fila por fila.
+
+Instalaciones nuevas: `init_db` crea la tabla ya particionada.
+Tablas existentes (requiere una ventana de mantenimiento; bloquea las escrituras
+mientras copia las filas):
+
+    python -m app.db.partitioning migrate
+
+Crear particiones futuras y aplicar la retención una vez:
+
+    python -m app.db.partitioning maintain
+"""
+import argparse
+import logging
+import re
+from datetime import date, datetime, timedelta
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+logger = logging.getLogger(__name__)
+
+TABLE = "notifications"
+_PARTITION_NAME = re.compile(rf"^{TABLE}_p(\d{{4}})(\d{{2}})$")
+
+# Misma estructura que el modelo Notification; la clave primaria incluye la clave de partición
+_COLUMNS = """
+    id integer NOT NULL DEFAULT nextval('{sequence}'::regclass),
+    user_id integer NOT NULL,
+    type varchar NOT NULL,
+    title varchar NOT NULL,
+    message varchar NOT NULL,
+    is_read boolean NOT NULL,
+    created_at timestamp without time zone NOT NULL,
+    read_at timestamp without time zone,
+    extra_data json,
+    CONSTRAINT {table}_pkey PRIMARY KEY (id, created_at)
+"""
+_COLUMN_NAMES = "id, user_id, type, title, message, is_read, created_at, read_at, extra_data"
+
+# Los índices de una tabla particionada se crean en la tabla padre (sin CONCURRENTLY) y
+# PostgreSQL los replica en cada partición
+_INDEXES = (
+    f"CREATE INDEX IF NOT EXISTS ix_notifications_user_created ON {TABLE} "
+    "(user_id, created_at DESC, id DESC)",
+    f"CREATE INDEX IF NOT EXISTS ix_notifications_user_unread ON {TABLE} "
+    "(user_id, created_at DESC, id DESC) WHERE is_read = false",
+)
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{TABLE}_p{month:%Y%m}"
+
+
+def is_partitioned(connection: Connection) -> bool:
+    """
+    Indica si `notifications` ya es una tabla particionada
+    """
+    return connection.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table pt "
+        "JOIN pg_class c ON c.oid = pt.partrelid "
+        "WHERE c.relname = :table AND pg_table_is_visible(c.oid))"
+    ), {"table": TABLE}).scalar()
+
+
+def list_partitions(connection: Connection, parent: str = TABLE) -> list[tuple[str, date]]:
+    """
+    Retorna (nombre, mes) de las particiones mensuales, de la más antigua a la más reciente
+    """
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = :parent AND pg_table_is_visible(p.oid)"
+    ), {"parent": parent}).scalars()
+    partitions = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            partitions.append((name, date(int(match.group(1)), int(match.group(2)), 1)))
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partition(connection: Connection, month: date, parent: str = TABLE) -> str:
+    name = partition_name(month)
+    connection.execute(text(
+        f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {parent} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')"
+    ))
+    return name
+
+
+def ensure_partitions(
+    connection: Connection,
+    months_ahead: int,
+    since: Optional[date] = None,
+    until: Optional[date] = None,
+    parent: str = TABLE
+) -> list[str]:
+    """
+    Crea las particiones que falten desde `since` (por defecto el mes actual) hasta
+    `months_ahead` meses en el futuro (o hasta `until`, si es posterior).
+    Retorna las particiones que se crearon.
+    """
+    existing = {name for name, _ in list_partitions(connection, parent)}
+    current = month_start(datetime.utcnow().date())
+    month = month_start(since) if since else current
+    last = add_months(current, months_ahead)
+    if until and month_start(until) > last:
+        last = month_start(until)
+    created = []
+    while month <= last:
+        if partition_name(month) not in existing:
+            created.append(create_partition(connection, month, parent))
+        month = add_months(month, 1)
+    return created
+
+
+def create_partitioned_table(connection: Connection, months_ahead: int) -> None:
+    """
+    Crea `notifications` particionada por mes con sus índices y particiones iniciales
+    """
+    sequence = f"{TABLE}_id_seq"
+    connection.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence} AS integer"))
+    connection.execute(text(
+        f"CREATE TABLE {TABLE} ({_COLUMNS.format(sequence=sequence, table=TABLE)}) "
+        "PARTITION BY RANGE (created_at)"
+    ))
+    connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id"))
+    for statement in _INDEXES:
+        connection.execute(text(statement))
+    ensure_partitions(connection, months_ahead)
+
+
+def migrate_to_partitioned(connection: Connection, months_ahead: int) -> int:
+    """
+    Convierte la tabla `notifications` existente en una tabla particionada, dentro de
+    la transacción de `connection`. Conserva los IDs y la secuencia. Retorna el número
+    de filas copiadas.
+    """
+    if is_partitioned(connection):
+        return 0
+    sequence = connection.execute(text(f"SELECT pg_get_serial_sequence('{TABLE}', 'id')")).scalar()
+    # Se permiten lecturas pero no escrituras mientras se copian las filas
+    connection.execute(text(f"LOCK TABLE {TABLE} IN EXCLUSIVE MODE"))
+    first, last, total = connection.execute(
+        text(f"SELECT min(created_at), max(created_at), count(*) FROM {TABLE}")
+    ).one()
+
+    staging = f"{TABLE}_partitioned"
+    connection.execute(text(
+        f"CREATE TABLE {staging} ({_COLUMNS.format(sequence=sequence, table=staging)}) "
+        "PARTITION BY RANGE (created_at)"
+    ))
+    ensure_partitions(
+        connection,
+        months_ahead,
+        since=first.date() if first else None,
+        until=last.date() if last else None,
+        parent=staging
+    )
+
+    copied = connection.execute(text(
+        f"INSERT INTO {staging} ({_COLUMN_NAMES}) SELECT {_COLUMN_NAMES} FROM {TABLE}"
+    )).rowcount
+    if copied != total:
+        raise RuntimeError(f"Se copiaron {copied} de {total} notificaciones; migración cancelada")
+
+    # La secuencia pertenece a la columna id de la tabla antigua: se desliga antes de borrarla
+    connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY NONE"))
+    connection.execute(text(f"DROP TABLE {TABLE}"))
+    connection.execute(text(f"ALTER TABLE {staging} RENAME TO {TABLE}"))
+    connection.execute(text(f"ALTER TABLE {TABLE} RENAME CONSTRAINT {staging}_pkey TO {TABLE}_pkey"))
+    connection.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {TABLE}.id"))
+    for statement in _INDEXES:
+        connection.execute(text(statement))
+    connection.execute(text(f"ANALYZE {TABLE}"))
+    return copied
+
+
+def has_unread(connection: Connection, partition: str) -> bool:
+    """
+    Indica si la partición tiene notificaciones sin leer (considerando la marca "todas leídas")
+    """
+    return connection.execute(text(
+        f"SELECT EXISTS (SELECT 1 FROM {partition} n WHERE n.is_read = false AND n.created_at > "
+        "COALESCE((SELECT s.last_read_all_at FROM notification_read_state s WHERE s.user_id = n.user_id), "
+        "'-infinity'::timestamp))"
+    )).scalar()
+
+
+def expired_partitions(
+    connection: Connection,
+    retention_days: Optional[int],
+    unread_retention_days: Optional[int] = None,
+    now: Optional[datetime] = None
+) -> list[str]:
+    """
+    Particiones cuyo mes completo quedó fuera de la retención.
+
+    Con `retention_days` vencen las particiones cuyas notificaciones ya fueron leídas
+    todas; con `unread_retention_days` vencen también las que aún tienen no leídas.
+    """
+    now = now or datetime.utcnow()
+    expired = []
+    for name, month in list_partitions(connection):
+        end = datetime.combine(add_months(month, 1), datetime.min.time())
+        if unread_retention_days is not None and end <= now - timedelta(days=unread_retention_days):
+            expired.append(name)
+        elif retention_days is not None and end <= now - timedelta(days=retention_days):
+            if not has_unread(connection, name):
+                expired.append(name)
+    return expired
+
+
+def remove_partition(connection: Connection, partition: str, action: str = "drop") -> None:
+    """
+    Elimina (`drop`) o desliga (`detach`, la tabla queda para archivarla) una partición
+    """
+    if action == "detach":
+        connection.execute(text(f"ALTER TABLE {TABLE} DETACH PARTITION {partition}"))
+    else:
+        connection.execute(text(f"DROP TABLE {partition}"))
+
+
+def main():
+    from app.core.config import settings
+    from app.core.retention import notification_partition_maintainer
+    from app.db.session import engine
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["migrate", "maintain"])
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        with engine.begin() as connection:
+            if is_partitioned(connection):
+                print(f"La tabla {TABLE} ya está particionada")
+                return
+            copied = migrate_to_partitioned(connection, settings.NOTIFICATIONS_PARTITION_MONTHS_AHEAD)
+            partitions = list_partitions(connection)
+        print(f"Tabla {TABLE} particionada: {copied} notificaciones en {len(partitions)} particiones")
+    else:
+        created, removed = notification_partition_maintainer.run_once()
+        print(f"Particiones creadas: {created or '-'}; eliminadas por retención: {removed or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,137 @@
 # app/db/database.py
-from sqlalchemy import create_engine
+import time
+from contextvars import ContextVar
+from typing import Optional
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import URL, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.metrics.prometheus import (
+    DB_POOL_CHECKED_OUT, DB_POOL_CHECKOUTS, DB_POOL_CHECKOUT_WAIT, DB_POOL_TIMEOUTS
+)
+
+
+class _CheckoutTimingMixin:
+    """
+    Mide cuánto espera cada checkout del pool (cola por una conexión libre más,
+    si aplica, el establecimiento de una conexión nueva)
+    """
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            DB_POOL_TIMEOUTS.inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+class InstrumentedQueuePool(_CheckoutTimingMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class QueryTimer:
+    """
+    Acumula cuántas sentencias SQL ejecutó una operación y cuánto tiempo pasaron en la base de datos
+    """
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def add(self, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+
+
+# Timer de la operación GraphQL trazada en curso (ver app/api/graphql/extensions.py);
+# fuera de una operación trazada las sentencias no se miden
+current_query_timer: ContextVar[Optional[QueryTimer]] = ContextVar("current_query_timer", default=None)
+
+
+def async_database_url(database_url: str) -> URL:
+    """
+    Traduce la URL de PostgreSQL al driver asyncpg ("postgresql://..." -> "postgresql+asyncpg://...")
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "postgresql":
+        url = url.set(drivername="postgresql+asyncpg")
+    return url
+
+
+def _pool_options() -> dict:
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _instrument(engine):
+    @event.listens_for(engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        DB_POOL_CHECKOUTS.inc()
+        DB_POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        DB_POOL_CHECKED_OUT.dec()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_execute(connection, cursor, statement, parameters, context, executemany):
+        if current_query_timer.get() is not None:
+            connection.info["query_started_at"] = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_execute(connection, cursor, statement, parameters, context, executemany):
+        started_at = connection.info.pop("query_started_at", None)
+        timer = current_query_timer.get()
+        if timer is not None and started_at is not None:
+            timer.add(time.perf_counter() - started_at)
+
+
+_is_postgres = make_url(settings.DATABASE_URL).get_backend_name() == "postgresql"
 
 # Crea el motor de la base de datos usando la URL del archivo de configuración
-# El argumento connect_args es específico para SQLite, lo quitamos para PostgreSQL.
-engine = create_engine(settings.DATABASE_URL)
+sync_options = _pool_options()
+# El statement_timeout se fija por conexión con las opciones de libpq
+if settings.DB_STATEMENT_TIMEOUT_MS > 0 and _is_postgres:
+    sync_options["connect_args"] = {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+engine = create_engine(settings.DATABASE_URL, poolclass=InstrumentedQueuePool, **sync_options)
+_instrument(engine)
 print("Connection Success")
+
 # Crea una fábrica de sesiones (SessionLocal) que se usará para crear nuevas sesiones de DB
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Motor asíncrono (asyncpg) para los resolvers GraphQL; solo se crea si está habilitado
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC_ENABLED:
+    async_options = _pool_options()
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0 and _is_postgres:
+        async_options["connect_args"] = {
+            "server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}
+        }
+    async_engine = create_async_engine(
+        async_database_url(settings.DATABASE_URL),
+        poolclass=InstrumentedAsyncQueuePool,
+        **async_options
+    )
+    _instrument(async_engine.sync_engine)
+    # expire_on_commit=False: los objetos siguen legibles tras el commit sin lazy-loads implícitos
+    AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
 # Base es una clase base para nuestros modelos ORM. Heredarán de ella.
 Base = declarative_base()
 
@@ -20,4 +141,10 @@ def get_db():
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+# Equivalente asíncrono de get_db (requiere DB_ASYNC_ENABLED)
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
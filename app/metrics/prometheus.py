@@ -1,16 +1,136 @@
-from prometheus_client import Counter, Histogram, generate_latest, CONTENT_TYPE_LATEST
+from prometheus_client import (
+    CollectorRegistry, Counter, Gauge, Histogram, generate_latest, multiprocess, CONTENT_TYPE_LATEST
+)
 from fastapi import Request, Response
+from starlette.routing import Match
+import glob
+import os
+import re
+import threading
 import time
 
+# Con varios workers (uvicorn --workers / gunicorn) cada proceso escribe sus métricas en
+# archivos mmap de este directorio y /metrics los agrega. prometheus_client lee la
+# variable al importarse, así que debe definirse antes de arrancar los workers.
+MULTIPROCESS_DIR = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
 # Métricas
 REQUEST_COUNT = Counter("http_requests_total", "Total requests", ["method", "endpoint", "http_status"])
 REQUEST_LATENCY = Histogram("http_request_duration_seconds", "Request latency", ["endpoint"])
 ERROR_COUNT = Counter("http_errors_total", "Errors per endpoint", ["endpoint", "status"])
 
+# Etiqueta de las rutas que no coinciden con ninguna ruta de la aplicación (escáneres, 404)
+UNMATCHED_ENDPOINT = "<unmatched>"
+
+# Métricas de operaciones GraphQL (ver app/api/graphql/extensions.py)
+GRAPHQL_OPERATIONS = Counter(
+    "graphql_operations_total", "GraphQL operations", ["operation_name", "operation_type", "status"]
+)
+GRAPHQL_OPERATION_LATENCY = Histogram(
+    "graphql_operation_duration_seconds", "GraphQL operation latency", ["operation_name", "operation_type"]
+)
+GRAPHQL_PHASE_LATENCY = Histogram(
+    "graphql_phase_duration_seconds", "GraphQL parse, validate and execute latency", ["phase"]
+)
+# Solo operaciones muestreadas (GRAPHQL_TRACING_SAMPLE_RATE)
+GRAPHQL_RESOLVER_LATENCY = Histogram(
+    "graphql_resolver_duration_seconds", "GraphQL resolver latency per field (Type.field)", ["field"],
+    buckets=(0.00005, 0.0001, 0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+GRAPHQL_OPERATION_DB_TIME = Histogram(
+    "graphql_operation_db_seconds", "Time spent in SQL statements per GraphQL operation", ["operation_name"]
+)
+
+# Métricas del envío de correos (SMTP)
+SMTP_CONNECT_LATENCY = Histogram(
+    "smtp_connect_duration_seconds", "Time to open an SMTP connection (TCP + TLS handshake)",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+SMTP_LOGIN_LATENCY = Histogram(
+    "smtp_login_duration_seconds", "Time to authenticate an SMTP connection",
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+SMTP_SEND_LATENCY = Histogram(
+    "smtp_send_duration_seconds", "Time of the SMTP transaction for one message (MAIL, RCPT, DATA)",
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+SMTP_IN_FLIGHT = Gauge(
+    "smtp_messages_in_flight", "Messages currently being sent over SMTP", multiprocess_mode="livesum"
+)
+EMAILS_TOTAL = Counter("emails_total", "Email send attempts per template", ["type", "outcome"])
+EMAIL_DELIVERY_LATENCY = Histogram(
+    "email_delivery_duration_seconds", "Email send latency per template, including pool checkout", ["type"],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+)
+# code_class: 4xx (transitorio), 5xx (permanente), connection (sin respuesta SMTP)
+EMAIL_FAILURES = Counter("email_failures_total", "Failed email send attempts", ["type", "code_class"])
+# Lo leen todos los workers de la misma tabla: en modo multiproceso se reporta el valor
+# más reciente de los workers vivos (el de un worker muerto quedaría fijo para siempre)
+EMAIL_OUTBOX_BACKLOG = Gauge(
+    "email_outbox_messages", "Messages in the email outbox by status", ["status"],
+    multiprocess_mode="livemostrecent"
+)
+# Marcas "todas leídas" que el compactador aún no aplicó; la cuenta cada worker tras su pasada
+READ_WATERMARKS_PENDING = Gauge(
+    "notification_read_watermarks_pending", "Mark-all-read watermarks waiting to be compacted",
+    multiprocess_mode="livemostrecent"
+)
+
+# Métricas del pool de conexiones a la base de datos
+# livesum: suma de los workers vivos (los archivos de un worker muerto se descartan)
+DB_POOL_CHECKED_OUT = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out from the pool",
+    multiprocess_mode="livesum"
+)
+DB_POOL_CHECKOUTS = Counter("db_pool_checkouts_total", "Total connection checkouts")
+DB_POOL_CHECKOUT_WAIT = Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+DB_POOL_TIMEOUTS = Counter("db_pool_timeouts_total", "Checkouts that timed out waiting for a connection")
+
+class BoundedLabel:
+    """
+    Limita los valores distintos de una etiqueta elegida por el cliente (p. ej. el nombre
+    de una operación GraphQL): los primeros `max_values` se conservan y el resto se
+    agrupa en `overflow`, para que la cardinalidad de las series no crezca sin límite.
+    """
+    def __init__(self, max_values: int, overflow: str = "other", max_length: int = 100):
+        self.max_values = max_values
+        self.overflow = overflow
+        self.max_length = max_length
+        self._values: set[str] = set()
+        self._lock = threading.Lock()
+
+    def __call__(self, value: str) -> str:
+        value = value[:self.max_length]
+        if value in self._values:
+            return value
+        with self._lock:
+            if len(self._values) < self.max_values:
+                self._values.add(value)
+                return value
+        return self.overflow
+
+
+def route_template(request: Request) -> str:
+    """
+    Plantilla de la ruta que atendió la petición (`/jobs/{job_id}`, no `/jobs/42`)
+    """
+    # FastAPI deja la ruta resuelta en el scope; las rutas de Starlette (docs) no
+    route = request.scope.get("route")
+    if route is not None:
+        return route.path
+    for route in request.app.router.routes:
+        match, _ = route.matches(request.scope)
+        if match != Match.NONE:
+            return route.path
+    return UNMATCHED_ENDPOINT
+
+
 # Middleware
 async def prometheus_middleware(request: Request, call_next):
     start_time = time.time()
-    endpoint = request.url.path
     method = request.method
 
     try:
@@ -18,9 +138,9 @@ async def prometheus_middleware(request: Request, call_next):
         status_code = response.status_code
     except Exception:
         status_code = 500
-        ERROR_COUNT.labels(endpoint=endpoint, status=str(status_code)).inc()
         raise
     finally:
+        endpoint = route_template(request)
         latency = time.time() - start_time
         REQUEST_LATENCY.labels(endpoint=endpoint).observe(latency)
         REQUEST_COUNT.labels(method=method, endpoint=endpoint, http_status=status_code).inc()
@@ -31,6 +151,43 @@ async def prometheus_middleware(request: Request, call_next):
 
     return response
 
+def mark_worker_dead(pid: int):
+    """
+    Descarta las métricas "live" de un worker que terminó (modo multiproceso)
+    """
+    if MULTIPROCESS_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROCESS_DIR)
+
+
+def cleanup_dead_workers() -> list[int]:
+    """
+    Descarta las métricas "live" de los workers que ya no existen (p. ej. un worker
+    de uvicorn que murió sin pasar por el shutdown). Retorna los PIDs descartados.
+    """
+    if not MULTIPROCESS_DIR:
+        return []
+    pids = set()
+    for path in glob.glob(os.path.join(MULTIPROCESS_DIR, "gauge_live*.db")):
+        match = re.search(r"_(\d+)\.db$", path)
+        if match:
+            pids.add(int(match.group(1)))
+    dead = []
+    for pid in pids:
+        try:
+            os.kill(pid, 0)
+        except ProcessLookupError:
+            mark_worker_dead(pid)
+            dead.append(pid)
+        except PermissionError:
+            pass  # Existe, pero pertenece a otro usuario
+    return dead
+
+
 # Endpoint de métricas
 def prometheus_metrics():
+    if MULTIPROCESS_DIR:
+        # Registro nuevo por scrape: agrega los archivos de todos los workers
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=MULTIPROCESS_DIR)
+        return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
     return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
\ No newline at end of file
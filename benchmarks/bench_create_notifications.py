@@ -0,0 +1,88 @@
+# benchmarks/bench_create_notifications.py
+"""
+Compara la creación de notificaciones una a una (`create_notification`: INSERT,
+COMMIT y SELECT de refresh por fila) contra `create_notifications`, que inserta
+el lote con un solo `INSERT ... VALUES (...), (...) RETURNING`.
+
+Crea una copia de la tabla `notifications` en un schema temporal `bench_notifications`
+de la base de DATABASE_URL (no toca la tabla real ni su secuencia) y lo elimina al
+terminar.
+
+    python -m benchmarks.bench_create_notifications --notifications 1000
+"""
+import argparse
+import time
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+from app.core.config import settings
+from app.crud import notification as crud_notification
+from app.db.model import Notification
+
+BENCH_SCHEMA = "bench_notifications"
+BENCH_USER_ID = -4242
+
+
+def items(count: int) -> list[dict]:
+    return [
+        {
+            "user_id": BENCH_USER_ID,
+            "type": "convocatoria",
+            "title": f"Convocatoria {i}",
+            "message": "Tu postulación fue recibida",
+            "extra_data": {"convocatoria_id": i}
+        }
+        for i in range(count)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--notifications", type=int, default=1000)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    # Las consultas del CRUD se redirigen a la copia de la tabla en el schema temporal
+    engine = create_engine(args.database_url).execution_options(schema_translate_map={None: BENCH_SCHEMA})
+    # Los índices del modelo se crean con CONCURRENTLY, que no admite transacciones
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {BENCH_SCHEMA}"))
+        Notification.__table__.create(connection)
+    Session = sessionmaker(bind=engine, autoflush=False)
+    statements = 0
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*_):
+        nonlocal statements
+        statements += 1
+
+    def run(name, fn):
+        nonlocal statements
+        statements = 0
+        with Session() as db:
+            start = time.perf_counter()
+            fn(db)
+            elapsed = time.perf_counter() - start
+        print(
+            f"  {name:<22} {elapsed * 1000:>9.1f} ms   "
+            f"{args.notifications / elapsed:>9.0f} notif/s   {statements} sentencias"
+        )
+
+    def single_row(db):
+        for item in items(args.notifications):
+            crud_notification.create_notification(db, **item)
+
+    def multi_row(db):
+        crud_notification.create_notifications(db, items(args.notifications))
+
+    print(f"\n{args.notifications} notificaciones")
+    try:
+        run("una por una", single_row)
+        run("INSERT multi-fila", multi_row)
+    finally:
+        with engine.begin() as connection:
+            connection.execute(text(f"DROP SCHEMA {BENCH_SCHEMA} CASCADE"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# benchmarks/bench_email_domain.py
+"""
+Compara el filtro por dominio de email con `LIKE '%@dominio'` contra la búsqueda
+por el índice de expresión `lower(split_part(email, '@', 2))`.
+
+Crea una tabla temporal `bench_users` con N usuarios en la base de DATABASE_URL
+(no toca la tabla `users`) y la elimina al terminar.
+
+    python -m benchmarks.bench_email_domain --users 1000000
+"""
+import argparse
+import statistics
+import time
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+DOMAINS = 200
+RUNS = 5
+
+
+def timed(connection, sql: str, params: dict) -> float:
+    samples = []
+    for _ in range(RUNS):
+        start = time.perf_counter()
+        connection.execute(text(sql), params).fetchall()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def plan(connection, sql: str, params: dict) -> str:
+    rows = connection.execute(text(f"EXPLAIN {sql}"), params).fetchall()
+    return " / ".join(row[0].strip() for row in rows if "Scan" in row[0])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=1_000_000)
+    parser.add_argument("--database-url", default=settings.DATABASE_URL)
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+        connection.execute(text("DROP TABLE IF EXISTS bench_users"))
+        connection.execute(text(
+            "CREATE TABLE bench_users ("
+            " id serial PRIMARY KEY, name varchar NOT NULL, role varchar NOT NULL,"
+            " email varchar NOT NULL UNIQUE, hashed_password varchar NOT NULL)"
+        ))
+        print(f"Insertando {args.users} usuarios...")
+        connection.execute(text(
+            "INSERT INTO bench_users (name, role, email, hashed_password) "
+            "SELECT 'user' || g, 'estudiante', 'user' || g || '@uni' || (g % :domains) || '.edu.co', 'x' "
+            "FROM generate_series(1, :users) g"
+        ), {"users": args.users, "domains": DOMAINS})
+        connection.execute(text("ANALYZE bench_users"))
+
+        params = {"suffix": "%@uni7.edu.co", "domain": "uni7.edu.co"}
+        like_sql = "SELECT id, name, email FROM bench_users WHERE email LIKE :suffix"
+        domain_sql = (
+            "SELECT id, name, email FROM bench_users "
+            "WHERE lower(split_part(email, '@', 2)) = :domain"
+        )
+
+        results = [
+            ("LIKE '%@dominio'", timed(connection, like_sql, params), plan(connection, like_sql, params)),
+            ("dominio sin índice", timed(connection, domain_sql, params), plan(connection, domain_sql, params)),
+        ]
+        connection.execute(text(
+            "CREATE INDEX ix_bench_users_email_domain ON bench_users (lower(split_part(email, '@', 2)))"
+        ))
+        connection.execute(text("ANALYZE bench_users"))
+        results.append(
+            ("dominio con índice", timed(connection, domain_sql, params), plan(connection, domain_sql, params))
+        )
+
+        print(f"\n{args.users} usuarios, {DOMAINS} dominios (mediana de {RUNS} ejecuciones)")
+        for name, ms, scan in results:
+            print(f"  {name:<20} {ms:>9.2f} ms   {scan}")
+
+        connection.execute(text("DROP TABLE bench_users"))
+
+
+if __name__ == "__main__":
+    main()
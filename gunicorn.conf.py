@@ -0,0 +1,28 @@
+# gunicorn.conf.py
+"""
+Configuración de gunicorn con workers de uvicorn y métricas de Prometheus en modo
+multiproceso:
+
+    gunicorn main:app -c gunicorn.conf.py
+"""
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8001')}"
+workers = int(os.environ.get("WEB_CONCURRENCY", "2"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# prometheus_client lee la variable al importarse: se define antes de cargar la app en los workers
+os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/prometheus_multiproc")
+
+
+def on_starting(server):
+    # Los archivos de una ejecución anterior duplicarían los contadores
+    path = os.environ["PROMETHEUS_MULTIPROC_DIR"]
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid, os.environ["PROMETHEUS_MULTIPROC_DIR"])
@@ -1,11 +1,25 @@
 # app/main.py
+import logging
+import os
+import threading
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.v1.endpoints import notification
 from app.api.graphql.router import graphql_router
+from app.core.config import settings
+from app.core.smtp_pool import smtp_pool
+from app.core.dispatch import email_dispatcher
+from app.core.compaction import read_watermark_compactor
+from app.core.retention import notification_partition_maintainer
+from app.core.stats import delivery_stats
+from app.core.delivery_log import delivery_log
+from app.db.init_db import init_db
+from app.db.session import async_engine
 
 #metrics
-from app.metrics.prometheus import prometheus_middleware, prometheus_metrics
+from app.metrics.prometheus import (
+    prometheus_middleware, prometheus_metrics, cleanup_dead_workers, mark_worker_dead
+)
 
 
 app = FastAPI(
@@ -15,6 +29,50 @@ app = FastAPI(
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+@app.on_event("startup")
+def startup():
+    # Modo multiproceso de Prometheus: descarta las métricas de workers que murieron
+    cleanup_dead_workers()
+    try:
+        init_db()
+    except Exception as e:
+        logger.error(f"No se pudieron crear las tablas del servicio: {str(e)}")
+    # Precalentar el pool SMTP sin bloquear el arranque si el servidor tarda en responder
+    if settings.SMTP_POOL_WARMUP:
+        threading.Thread(target=smtp_pool.warm_up, name="smtp-warmup", daemon=True).start()
+    # Vuelca periódicamente los contadores de envíos a los rollups de estadísticas
+    delivery_stats.start()
+    # Escribe por lotes el registro de envíos (email_delivery_log)
+    delivery_log.start()
+    # Arranca los workers del outbox (los leases vencidos de otros nodos se reclaman solos)
+    email_dispatcher.start()
+    # Aplica en segundo plano las marcas "todas leídas" a las filas de notificaciones
+    read_watermark_compactor.start()
+    # Particiones futuras de notifications y retención por particiones completas
+    notification_partition_maintainer.start()
+
+
+@app.on_event("shutdown")
+def shutdown():
+    email_dispatcher.stop()
+    read_watermark_compactor.stop()
+    notification_partition_maintainer.stop()
+    # Después de detener los workers, para volcar también sus últimos envíos
+    delivery_stats.stop()
+    delivery_log.stop()
+    smtp_pool.close_all()
+    mark_worker_dead(os.getpid())
+
+
+@app.on_event("shutdown")
+async def dispose_async_engine():
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 # Agregar el middleware
 app.middleware("http")(prometheus_middleware)
 